@@ -0,0 +1,62 @@
+"""Measures Chat with Resume rerun time against conversation length.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_chat_history [--sizes 10 100 1000] [--repeat 5]
+
+Each size is run twice through Streamlit's AppTest harness: once with the
+token budget and virtualized rendering disabled (the previous behaviour) and
+once with the defaults from ``utils``.
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+import utils
+
+CHAT_PAGE = os.path.abspath(glob.glob("pages/5_*Chat_with_Resume.py")[0])
+
+# Defaults captured before time_rerun() starts toggling them.
+BUDGET = utils.CHAT_HISTORY_TOKEN_BUDGET
+VISIBLE = utils.CHAT_HISTORY_VISIBLE
+
+def make_history(n_messages: int) -> list[dict]:
+    messages = []
+    for i in range(n_messages):
+        if i % 2 == 0:
+            messages.append({"role": "user", "content": f"Question {i}: what did he work on in project {i}?"})
+        else:
+            messages.append({"role": "assistant", "content": f"Answer {i}: " + "He built an optimizer. " * 12})
+    return messages
+
+def time_rerun(n_messages: int, bounded: bool, repeat: int) -> tuple[float, int]:
+    """Median rerun time in ms and the number of messages kept in session state."""
+    utils.CHAT_HISTORY_TOKEN_BUDGET = BUDGET if bounded else None
+    utils.CHAT_HISTORY_VISIBLE = VISIBLE if bounded else None
+    samples = []
+    for _ in range(repeat):
+        at = AppTest.from_file(CHAT_PAGE, default_timeout=60)
+        at.session_state["messages"] = make_history(n_messages)
+        start = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(at.session_state["messages"])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'messages':>8} {'unbounded (ms)':>15} {'bounded (ms)':>13} {'kept':>6}")
+    for n in args.sizes:
+        unbounded_ms, _ = time_rerun(n, bounded=False, repeat=args.repeat)
+        bounded_ms, kept = time_rerun(n, bounded=True, repeat=args.repeat)
+        print(f"{n:>8} {unbounded_ms:>15.1f} {bounded_ms:>13.1f} {kept:>6}")
+
+if __name__ == "__main__":
+    main()
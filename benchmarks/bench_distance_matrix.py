@@ -0,0 +1,65 @@
+"""Benchmarks the vectorized haversine matrix against the original scalar helpers.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_distance_matrix [--sizes 12 1000 10000]
+
+The scalar all-pairs time is measured on at most ``--scalar-rows`` rows and
+extrapolated for larger n (marked with ``~``); running it in full at 10k
+points takes minutes.
+"""
+import argparse
+import time
+
+import numpy as np
+
+import routing
+
+def scalar_rows(lats, lons, rows: int) -> None:
+    n = len(lats)
+    for i in range(rows):
+        for j in range(n):
+            routing.haversine(lats[i], lons[i], lats[j], lons[j])
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12, 1000, 10000])
+    parser.add_argument("--scalar-rows", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(42)
+    print(f"{'n':>6} {'scalar (s)':>12} {'numpy f64 (s)':>14} {'numpy f32 (s)':>14} "
+          f"{'speedup':>9} {'max |f32-f64| (m)':>18} {'cached (us)':>12}")
+    for n in args.sizes:
+        lats = 19.0760 + rng.normal(0, 0.05, n)
+        lons = 72.8777 + rng.normal(0, 0.05, n)
+
+        rows = min(n, args.scalar_rows)
+        _, scalar_s = timed(scalar_rows, lats, lons, rows)
+        scalar_s *= n / rows
+        approx = "~" if rows < n else " "
+
+        d64, f64_s = timed(routing.haversine_matrix, lats, lons)
+        d32, f32_s = timed(routing.haversine_matrix, lats, lons, dtype=np.float32)
+        max_err_m = float(np.abs(d32 - d64).max()) * 1000
+        del d32
+
+        # Spot-check against the scalar reference.
+        i, j = rng.randint(n, size=2)
+        assert abs(d64[i, j] - routing.haversine(lats[i], lons[i], lats[j], lons[j])) < 1e-9
+        del d64
+
+        routing.distance_matrix(lats, lons, dtype=np.float32)
+        _, cached_s = timed(routing.distance_matrix, lats, lons, dtype=np.float32)
+        routing._cached_distance_matrix.cache_clear()
+
+        print(f"{n:>6} {approx}{scalar_s:>11.4f} {f64_s:>14.4f} {f32_s:>14.4f} "
+              f"{scalar_s / f64_s:>8.0f}x {max_err_m:>18.3f} {cached_s * 1e6:>12.1f}")
+
+if __name__ == "__main__":
+    main()
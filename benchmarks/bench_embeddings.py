@@ -0,0 +1,79 @@
+"""Compares resume index build time and retrieval recall across embedding backends.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_embeddings [--pdf assets/resume.pdf] [--k 4]
+
+The OpenAI backend is only measured when ``OPENAI_API_KEY`` is set. Indexes
+are built from scratch (the on-disk cache is bypassed) so the numbers reflect
+a cold build.
+"""
+import argparse
+import os
+import time
+
+import utils
+import rag
+
+# (question, keyword that must appear in a retrieved chunk)
+EVAL_QUESTIONS = [
+    ("What is his GPA?", "GPA"),
+    ("What is his Codeforces rating?", "Codeforces"),
+    ("Where did he do his data science internship?", "Encryptix"),
+    ("Which university does he study at?", "Kharagpur"),
+    ("Which programming languages does he know?", "Python"),
+    ("Has he worked with genetic algorithms?", "Genetic"),
+    ("What degree is he pursuing?", "Tech"),
+    ("Has he built anything for fraud detection?", "Fraud"),
+]
+
+def recall_at_k(vectorstore, chunks, k: int) -> tuple[float, int]:
+    """Fraction of answerable questions whose keyword appears in the top-k chunks."""
+    answerable = [
+        (q, kw) for q, kw in EVAL_QUESTIONS
+        if any(kw.lower() in c.page_content.lower() for c in chunks)
+    ]
+    if not answerable:
+        return float("nan"), 0
+    found = 0
+    for question, keyword in answerable:
+        docs = vectorstore.similarity_search(question, k=k)
+        found += any(keyword.lower() in d.page_content.lower() for d in docs)
+    return found / len(answerable), len(answerable)
+
+def main():
+    from langchain_community.vectorstores import FAISS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf", default=utils.RESUME_PDF_PATH)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    chunks = utils.load_resume_chunks(args.pdf)
+    print(f"{len(chunks)} chunks from {args.pdf}\n")
+
+    backends = ["local"]
+    if os.environ.get("OPENAI_API_KEY"):
+        backends.append("openai")
+    else:
+        print("OPENAI_API_KEY not set; skipping the openai backend.\n")
+
+    print(f"{'backend':<8} {'build (ms)':>11} {'query (ms)':>11} {'recall@' + str(args.k):>10}")
+    for backend in backends:
+        embeddings, _ = rag.make_embeddings(backend, os.environ.get("OPENAI_API_KEY"))
+        build_times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            vectorstore = FAISS.from_documents(chunks, embeddings)
+            build_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        recall, n_answerable = recall_at_k(vectorstore, chunks, args.k)
+        query_ms = (time.perf_counter() - start) * 1000 / max(n_answerable, 1)
+
+        print(f"{backend:<8} {min(build_times) * 1000:>11.1f} {query_ms:>11.2f} "
+              f"{recall:>10.2f}  ({n_answerable} answerable questions)")
+
+if __name__ == "__main__":
+    main()
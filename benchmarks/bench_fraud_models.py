@@ -0,0 +1,52 @@
+"""Compares the fraud models on load time, single-row latency and batch throughput.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fraud_models [--calls 2000] [--batch 100000]
+
+Models are trained and saved under ``.cache/fraud`` on first use, exactly as
+the Projects page does. Load time is the ``joblib.load`` of the saved
+artifact with scikit-learn already imported; quality is ROC AUC on a fresh
+synthetic holdout labelled the same way as the training data.
+"""
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+import sklearn.ensemble  # noqa: F401  (imported up front so load times exclude it)
+import sklearn.linear_model  # noqa: F401
+from sklearn.metrics import roc_auc_score
+
+import fraud
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000, help="single-row calls per model")
+    parser.add_argument("--batch", type=int, default=100_000, help="rows per batched call")
+    parser.add_argument("--repeat", type=int, default=5, help="batched calls per model")
+    args = parser.parse_args()
+
+    X_test, y_test = fraud.training_data(50_000, seed=7)
+    print(f"{'model':>24} {'load (ms)':>10} {'size (KB)':>10} {'p50 (us)':>9} {'p99 (us)':>9} "
+          f"{'batch rows/s':>13} {'AUC':>7}")
+    for kind, label in fraud.MODEL_TYPES.items():
+        fraud.load_model(kind)  # trains and saves on the first run
+        load_ms = size_kb = float("nan")
+        model = None
+        if kind != "baseline":
+            path = fraud.model_path(kind)
+            start = time.perf_counter()
+            model = joblib.load(path)
+            load_ms = (time.perf_counter() - start) * 1000
+            size_kb = os.path.getsize(path) / 1024
+
+        single = fraud.benchmark_latency(args.calls, batch_size=1000, model=model)["single"]
+        batch = fraud.benchmark_latency(args.repeat, batch_size=args.batch, model=model)["batch"]
+        auc = roc_auc_score(y_test, fraud.score(X_test, model))
+        print(f"{label:>24} {load_ms:>10.1f} {size_kb:>10.1f} {np.percentile(single, 50) * 1e6:>9.1f} "
+              f"{np.percentile(single, 99) * 1e6:>9.1f} {args.batch / np.median(batch):>13,.0f} {auc:>7.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Checks and times the grid-backed greedy constructor against the matrix version.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_greedy [--sizes 1000 10000 100000]
+
+First verifies that ``solve_greedy_spatial`` reproduces ``solve_greedy`` on
+the Projects page's seed-42 instance and on larger random instances, then
+times both. The matrix version is skipped above ``--matrix-limit`` points.
+"""
+import argparse
+import time
+
+import numpy as np
+
+import routing
+
+def projects_page_instance(n_points: int = 12, seed: int = 42):
+    rng = np.random.RandomState(seed=seed)
+    lats = 19.0760 + rng.normal(0, 0.05, n_points)
+    lons = 72.8777 + rng.normal(0, 0.05, n_points)
+    return lats, lons
+
+def check_matches(lats, lons) -> None:
+    expected = routing.solve_greedy(routing.haversine_matrix(lats, lons))
+    actual = routing.solve_greedy_spatial(lats, lons)
+    assert np.array_equal(expected, actual), f"routes differ:\n{expected}\n{actual}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--matrix-limit", type=int, default=10000)
+    args = parser.parse_args()
+
+    check_matches(*projects_page_instance())
+    for n in (50, 500, 2000):
+        check_matches(*projects_page_instance(n, seed=n))
+    print("solve_greedy_spatial matches solve_greedy on the seed-42 instance and 3 random ones.\n")
+
+    print(f"{'n':>7} {'matrix (s)':>11} {'grid (s)':>9} {'route km':>10}")
+    for n in args.sizes:
+        lats, lons = projects_page_instance(n)
+        matrix_s = float("nan")
+        if n <= args.matrix_limit:
+            start = time.perf_counter()
+            routing.solve_greedy(routing.haversine_matrix(lats, lons, dtype=np.float32))
+            matrix_s = time.perf_counter() - start
+        start = time.perf_counter()
+        route = routing.solve_greedy_spatial(lats, lons)
+        grid_s = time.perf_counter() - start
+        km = routing.route_length_fn(routing.pair_distance(None, lats, lons), route)
+        print(f"{n:>7} {matrix_s:>11.2f} {grid_s:>9.2f} {km:>10.1f}")
+
+if __name__ == "__main__":
+    main()
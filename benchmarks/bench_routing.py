@@ -0,0 +1,280 @@
+"""Runs every routing solver on standard and synthetic instances and tracks regressions.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_routing [--sizes 100 500 2000 5000] [--tsplib DIR]
+                                       [--compare PREVIOUS.json]
+
+Instances are synthetic Mumbai-centred point sets from
+``utils.generate_vrp_data`` (open routes from the first point, as on the
+Projects page) plus any TSPLIB ``.tsp`` files in ``--tsplib`` (closed tours
+under the TSPLIB distance function). No TSPLIB files ship with the repo;
+download them from the TSPLIB site. Best-known tour lengths come from
+``BEST_KNOWN`` or a ``--best-known`` JSON file mapping instance name to
+length; the gap is left empty when none is known.
+
+Every pipeline is deterministic (fixed seeds and a fixed generation count
+for the genetic algorithm, no time budgets). Each one runs twice: once for
+wall time and once under ``tracemalloc`` for peak memory, since tracing slows
+the pure-Python local search down. Results are written to a JSON file under
+``.cache/benchmarks``; ``--compare`` flags pipelines that got slower, used
+more memory or found longer routes than in a previous results file and
+exits with status 1 if any did.
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+
+import routing
+from utils import generate_vrp_data
+
+RESULTS_DIR = os.path.join(".cache", "benchmarks")
+
+# Optimal tour lengths published with TSPLIB.
+BEST_KNOWN = {
+    "burma14": 3323, "ulysses16": 6859, "ulysses22": 7013, "att48": 10628, "eil51": 426,
+    "berlin52": 7542, "st70": 675, "eil76": 538, "pr76": 108159, "gr96": 55209, "rat99": 1211,
+    "kroA100": 21282, "eil101": 629, "lin105": 14379, "ch130": 6110, "ch150": 6528,
+    "kroA200": 29368, "a280": 2579, "pcb442": 50778, "pr1002": 259045,
+}
+
+# --- TSPLIB ---
+
+def _nint(x):
+    return np.floor(x + 0.5)
+
+def _geo_radians(x):
+    degrees = np.trunc(x)
+    return 3.141592 * (degrees + 5.0 * (x - degrees) / 3.0) / 180.0
+
+def tsplib_distances(coords: np.ndarray, weight_type: str) -> np.ndarray:
+    """Integer TSPLIB distance matrix for ``NODE_COORD_SECTION`` coordinates."""
+    x, y = coords[:, 0], coords[:, 1]
+    if weight_type == "GEO":
+        lat, lon = _geo_radians(x), _geo_radians(y)
+        q1 = np.cos(lon[:, None] - lon[None, :])
+        q2 = np.cos(lat[:, None] - lat[None, :])
+        q3 = np.cos(lat[:, None] + lat[None, :])
+        arc = np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0))
+        dist = np.trunc(6378.388 * arc + 1.0)
+        np.fill_diagonal(dist, 0)
+        return dist
+    dx = x[:, None] - x[None, :]
+    dy = y[:, None] - y[None, :]
+    if weight_type == "ATT":
+        r = np.sqrt((dx * dx + dy * dy) / 10.0)
+        t = _nint(r)
+        return np.where(t < r, t + 1, t)
+    euclid = np.sqrt(dx * dx + dy * dy)
+    if weight_type == "CEIL_2D":
+        return np.ceil(euclid)
+    if weight_type == "EUC_2D":
+        return _nint(euclid)
+    raise ValueError(f"unsupported EDGE_WEIGHT_TYPE {weight_type}")
+
+def _explicit_matrix(weights: list[float], n: int, fmt: str) -> np.ndarray:
+    dist = np.zeros((n, n))
+    if fmt == "FULL_MATRIX":
+        return np.asarray(weights[:n * n], dtype=np.float64).reshape(n, n)
+    rows = {
+        "UPPER_ROW": [(i, j) for i in range(n) for j in range(i + 1, n)],
+        "LOWER_ROW": [(i, j) for i in range(n) for j in range(i)],
+        "UPPER_DIAG_ROW": [(i, j) for i in range(n) for j in range(i, n)],
+        "LOWER_DIAG_ROW": [(i, j) for i in range(n) for j in range(i + 1)],
+    }
+    if fmt not in rows:
+        raise ValueError(f"unsupported EDGE_WEIGHT_FORMAT {fmt}")
+    i, j = np.array(rows[fmt]).T
+    dist[i, j] = weights[:len(i)]
+    dist[j, i] = weights[:len(i)]
+    return dist
+
+def load_tsplib(path: str) -> dict:
+    """Parses a symmetric TSPLIB ``.tsp`` file into a benchmark instance."""
+    spec, coords, weights, section = {}, [], [], None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line == "EOF":
+                continue
+            if line.endswith("_SECTION"):
+                section = line
+                continue
+            if section is None:
+                key, _, value = line.partition(":")
+                spec[key.strip()] = value.strip()
+                continue
+            if section == "NODE_COORD_SECTION":
+                _, x, y = line.split()[:3]
+                coords.append((float(x), float(y)))
+            elif section == "EDGE_WEIGHT_SECTION":
+                weights.extend(float(w) for w in line.split())
+    if spec.get("TYPE", "TSP") != "TSP":
+        raise ValueError(f"{path}: only symmetric TSP instances are supported")
+    n = int(spec["DIMENSION"])
+    weight_type = spec.get("EDGE_WEIGHT_TYPE", "EUC_2D")
+    if weight_type == "EXPLICIT":
+        dist = _explicit_matrix(weights, n, spec.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX"))
+    else:
+        dist = tsplib_distances(np.array(coords[:n]), weight_type)
+    name = spec.get("NAME", os.path.splitext(os.path.basename(path))[0])
+    return {"name": name, "n": n, "dist": dist, "lats": None, "lons": None, "closed": True}
+
+# --- INSTANCES ---
+
+def synthetic_instance(n: int, seed: int) -> dict:
+    df = generate_vrp_data(n, seed=seed)
+    lats, lons = df["lat"].to_numpy(), df["lon"].to_numpy()
+    dist = routing.haversine_matrix(lats, lons) if n <= routing.MATRIX_LIMIT else None
+    return {"name": f"mumbai-{n}", "n": n, "dist": dist, "lats": lats, "lons": lons, "closed": False}
+
+def pipelines(inst: dict, ga_generations: int, seed: int) -> dict:
+    """Solver pipelines applicable to ``inst``, each returning a route."""
+    dist, lats, lons, closed = inst["dist"], inst["lats"], inst["lons"], inst["closed"]
+    runs = {}
+    if dist is not None:
+        def ga(route):
+            return routing.solve_genetic(dist, route, time_budget=math.inf, max_generations=ga_generations,
+                                         seed=seed, closed=closed).route
+
+        runs["greedy"] = lambda: routing.solve_greedy(dist)
+        runs["greedy+local"] = lambda: routing.improve_route(routing.solve_greedy(dist), dist=dist,
+                                                             closed=closed).route
+        runs["greedy+ga"] = lambda: ga(routing.solve_greedy(dist))
+        runs["greedy+ga+local"] = lambda: routing.improve_route(ga(routing.solve_greedy(dist)), dist=dist,
+                                                                closed=closed).route
+    if lats is not None:
+        runs["grid-greedy"] = lambda: routing.solve_greedy_spatial(lats, lons)
+        runs["grid-greedy+local"] = lambda: routing.improve_route(routing.solve_greedy_spatial(lats, lons),
+                                                                  lats=lats, lons=lons, closed=closed).route
+    return runs
+
+def tour_length(inst: dict, route) -> float:
+    if inst["dist"] is not None:
+        return routing.route_length(inst["dist"], route, inst["closed"])
+    return routing.route_length_fn(routing.pair_distance(None, inst["lats"], inst["lons"]), route, inst["closed"])
+
+def measure(fn) -> tuple[object, float, float]:
+    """Result, wall seconds, and peak traced memory in MB (from a second, traced run)."""
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 2 ** 20
+
+def run_instance(inst: dict, best_known: dict, ga_generations: int, seed: int) -> list[dict]:
+    rows = []
+    best = best_known.get(inst["name"])
+    for solver, fn in pipelines(inst, ga_generations, seed).items():
+        route, seconds, peak_mb = measure(fn)
+        assert sorted(route.tolist()) == list(range(inst["n"])), f"{solver} returned an invalid route"
+        length = tour_length(inst, route)
+        rows.append({
+            "instance": inst["name"], "n": inst["n"], "solver": solver,
+            "seconds": round(seconds, 4), "peak_mb": round(peak_mb, 2), "length": round(length, 4),
+            "best_known": best, "gap_pct": round(100 * (length - best) / best, 3) if best else None,
+        })
+        gap = f"{rows[-1]['gap_pct']:>7.2f}%" if best else f"{'':>8}"
+        print(f"{inst['name']:>14} {solver:>18} {seconds:>9.3f} {peak_mb:>9.1f} {length:>12.2f} {gap}")
+    return rows
+
+# --- REGRESSIONS ---
+
+def compare(current: list[dict], previous: list[dict], time_tol: float, memory_tol: float,
+            length_tol: float) -> list[str]:
+    """Descriptions of every pipeline that regressed against ``previous``."""
+    before = {(r["instance"], r["solver"]): r for r in previous}
+    flags = []
+    for row in current:
+        old = before.get((row["instance"], row["solver"]))
+        if old is None:
+            continue
+        label = f"{row['instance']} / {row['solver']}"
+        # Absolute floors keep millisecond-scale noise from being flagged.
+        if row["seconds"] > old["seconds"] * (1 + time_tol) and row["seconds"] - old["seconds"] > 0.05:
+            flags.append(f"{label}: {old['seconds']:.3f}s -> {row['seconds']:.3f}s")
+        if row["peak_mb"] > old["peak_mb"] * (1 + memory_tol) and row["peak_mb"] - old["peak_mb"] > 1.0:
+            flags.append(f"{label}: peak {old['peak_mb']:.1f} MB -> {row['peak_mb']:.1f} MB")
+        if row["length"] > old["length"] * (1 + length_tol):
+            flags.append(f"{label}: length {old['length']:.2f} -> {row['length']:.2f}")
+    return flags
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000, 5000])
+    parser.add_argument("--tsplib", help="directory of TSPLIB .tsp files")
+    parser.add_argument("--best-known", help="JSON file mapping instance name to best-known length")
+    parser.add_argument("--ga-generations", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results file (default: .cache/benchmarks/routing-<time>.json)")
+    parser.add_argument("--compare", help="previous results file to check for regressions")
+    parser.add_argument("--time-tol", type=float, default=0.2, help="allowed relative slowdown")
+    parser.add_argument("--memory-tol", type=float, default=0.2, help="allowed relative peak memory growth")
+    parser.add_argument("--length-tol", type=float, default=0.001, help="allowed relative route length growth")
+    args = parser.parse_args()
+
+    best_known = dict(BEST_KNOWN)
+    if args.best_known:
+        with open(args.best_known) as f:
+            best_known.update(json.load(f))
+
+    instances = [lambda n=n: synthetic_instance(n, args.seed) for n in args.sizes]
+    if args.tsplib:
+        for file_name in sorted(os.listdir(args.tsplib)):
+            if file_name.endswith(".tsp"):
+                instances.append(lambda p=os.path.join(args.tsplib, file_name): load_tsplib(p))
+
+    import sklearn.neighbors  # noqa: F401  (keeps the one-off import out of the first local search timing)
+
+    print(f"{'instance':>14} {'solver':>18} {'time (s)':>9} {'peak MB':>9} {'length':>12} {'gap':>8}")
+    rows = []
+    for make_instance in instances:
+        rows.extend(run_instance(make_instance(), best_known, args.ga_generations, args.seed))
+
+    stamp = datetime.datetime.now()
+    output = args.output or os.path.join(RESULTS_DIR, f"routing-{stamp:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "created": stamp.isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "ga_generations": args.ga_generations,
+            "seed": args.seed,
+            "results": rows,
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+        flags = compare(rows, previous, args.time_tol, args.memory_tol, args.length_tol)
+        if flags:
+            print(f"\n{len(flags)} regression(s) against {args.compare}:")
+            for flag in flags:
+                print(f"  - {flag}")
+            raise SystemExit(1)
+        print(f"No regressions against {args.compare}.")
+
+if __name__ == "__main__":
+    main()
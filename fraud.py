@@ -0,0 +1,367 @@
+"""Fraud scoring for the Fraud Detection demo on the Projects page.
+
+A transaction is the feature row ``(V1, V2, Amount)``. The single-transaction
+sliders and the batch CSV scorer go through ``score``, which uses the
+hand-written baseline formula unless given one of the scikit-learn models from
+``load_model``. The synthetic generator labels its rows with the same baseline
+kernel, ``baseline_logit``, shifted by an intercept, so no two places can
+disagree about the formula.
+"""
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ["V1", "V2", "Amount"]
+
+# Baseline logistic model: logit = WEIGHTS . (x - CENTER)
+WEIGHTS = np.array([4.0, 3.0, 0.0003])
+CENTER = np.array([0.5, 0.4, 2000.0])
+
+FLAG_THRESHOLD = 0.6
+REVIEW_THRESHOLD = 0.2
+
+SCORE_CHUNK_ROWS = 100_000
+GENERATOR_CHUNK_ROWS = 250_000
+MODEL_DIR = os.path.join(".cache", "fraud")
+MODEL_TYPES = {"baseline": "Baseline formula", "logistic": "Logistic regression",
+               "boosting": "Gradient-boosted trees"}
+TRAINING_ROWS = 200_000
+TRAINING_SEED = 42
+LATENCY_BUFFER_SIZE = 4096
+
+# --- SCORING ---
+
+def sigmoid(x):
+    """Logistic function that never overflows: ``exp`` only ever sees non-positive inputs."""
+    x = np.asarray(x, dtype=np.float64)
+    z = np.exp(-np.abs(x))
+    return np.where(x >= 0, 1.0 / (1.0 + z), z / (1.0 + z))
+
+def as_features(data) -> np.ndarray:
+    """``(n, 3)`` float64 feature matrix from a DataFrame with ``FEATURES`` columns or an array-like."""
+    if isinstance(data, pd.DataFrame):
+        data = data[FEATURES].to_numpy(dtype=np.float64)
+    return np.atleast_2d(np.asarray(data, dtype=np.float64))
+
+def require_columns(df: pd.DataFrame, columns: list[str]):
+    """Raises ``ValueError`` naming any of ``columns`` missing from ``df``."""
+    missing = set(columns) - set(df.columns)
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+
+def baseline_logit(X) -> np.ndarray:
+    """Log-odds of fraud for every row of ``X`` under the baseline formula."""
+    return (as_features(X) - CENTER) @ WEIGHTS
+
+def score(X, model=None) -> np.ndarray:
+    """Fraud probability of every row of ``X`` under ``model`` (the baseline formula when ``None``)."""
+    X = as_features(X)
+    if model is None:
+        return sigmoid(baseline_logit(X))
+    return model.predict_proba(X)[:, 1]
+
+def score_one(v1: float, v2: float, amount: float, model=None) -> float:
+    return float(score([[v1, v2, amount]], model)[0])
+
+def risk_level(prob) -> np.ndarray:
+    """``"FLAGGED"``, ``"Review"`` or ``"Safe"`` for each probability."""
+    prob = np.asarray(prob)
+    return np.select([prob > FLAG_THRESHOLD, prob > REVIEW_THRESHOLD], ["FLAGGED", "Review"], "Safe")
+
+# --- SYNTHETIC DATA ---
+
+@lru_cache(maxsize=16)
+def fraud_intercept(fraud_rate: float | None, sample_rows: int = 1_000_000, seed: int = 0) -> float:
+    """Logit shift that makes ``fraud_rate`` of uniformly sampled transactions score above 0.5.
+
+    ``None`` keeps the baseline model unchanged (intercept 0).
+    """
+    if fraud_rate is None:
+        return 0.0
+    if not 0 < fraud_rate < 1:
+        raise ValueError("fraud_rate must be between 0 and 1")
+    X = synthetic_features(np.random.default_rng(seed), sample_rows)
+    return -float(np.quantile(baseline_logit(X), 1 - fraud_rate))
+
+def synthetic_features(rng: np.random.Generator, n: int) -> np.ndarray:
+    return np.column_stack([rng.uniform(0, 1, n), rng.uniform(0, 1, n), rng.integers(0, 20000, n)])
+
+def synthetic_batch(rng: np.random.Generator, n: int, intercept: float = 0.0) -> pd.DataFrame:
+    """``n`` uniformly sampled transactions labelled by the baseline model shifted by ``intercept``."""
+    X = synthetic_features(rng, n)
+    prob = sigmoid(baseline_logit(X) + intercept)
+    return pd.DataFrame({"V1": X[:, 0], "V2": X[:, 1], "Amount": X[:, 2].astype(np.int64), "Fraud_Prob": prob,
+                         "Label": (prob > 0.5).astype(int)})
+
+def synthetic_chunks(n_rows: int, fraud_rate: float | None = None, seed: int = 42,
+                     chunk_rows: int = GENERATOR_CHUNK_ROWS):
+    """Yields ``n_rows`` synthetic transactions as DataFrames of at most ``chunk_rows`` rows.
+
+    Every chunk draws from its own stream spawned from ``SeedSequence(seed)``,
+    so the output is reproducible and chunks never share random numbers.
+    """
+    intercept = fraud_intercept(fraud_rate)
+    n_chunks = -(-n_rows // chunk_rows)
+    for i, child in enumerate(np.random.SeedSequence(seed).spawn(n_chunks)):
+        yield synthetic_batch(np.random.default_rng(child), min(chunk_rows, n_rows - i * chunk_rows), intercept)
+
+@dataclass
+class GenerationStats:
+    """Totals from ``write_synthetic``."""
+    rows: int = 0
+    frauds: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+def write_synthetic(path: str, n_rows: int, fmt: str = "csv", fraud_rate: float | None = None, seed: int = 42,
+                    chunk_rows: int = GENERATOR_CHUNK_ROWS, on_chunk=None) -> GenerationStats:
+    """Writes ``synthetic_chunks`` to ``path`` as CSV or Parquet one chunk at a time.
+
+    Peak memory is bounded by ``chunk_rows``. Parquet needs ``pyarrow``;
+    each chunk becomes one row group. ``on_chunk(stats)`` is called after
+    every chunk.
+    """
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    elif fmt != "csv":
+        raise ValueError(f"unknown format {fmt!r}; expected 'csv' or 'parquet'")
+    stats = GenerationStats()
+    started = time.perf_counter()
+    writer = None
+    try:
+        for i, chunk in enumerate(synthetic_chunks(n_rows, fraud_rate, seed, chunk_rows)):
+            if fmt == "parquet":
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(path, index=False, header=i == 0, mode="w" if i == 0 else "a")
+            stats.rows += len(chunk)
+            stats.frauds += int(chunk["Label"].sum())
+            stats.elapsed = time.perf_counter() - started
+            if on_chunk is not None:
+                on_chunk(stats)
+    finally:
+        if writer is not None:
+            writer.close()
+    return stats
+
+# --- TRAINED MODELS ---
+
+def training_data(n: int = TRAINING_ROWS, seed: int = TRAINING_SEED) -> tuple[np.ndarray, np.ndarray]:
+    """Synthetic features with labels sampled from the baseline probability.
+
+    Sampling rather than thresholding at 0.5 gives the models a noisy,
+    calibrated target instead of a perfectly separable one.
+    """
+    rng = np.random.default_rng(seed)
+    df = synthetic_batch(rng, n)
+    return as_features(df), (rng.uniform(size=n) < df["Fraud_Prob"].to_numpy()).astype(int)
+
+def train_model(kind: str, X: np.ndarray, y: np.ndarray):
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if kind == "logistic":
+        model = make_pipeline(StandardScaler(), LogisticRegression())
+    elif kind == "boosting":
+        model = HistGradientBoostingClassifier(max_iter=100, random_state=TRAINING_SEED)
+    else:
+        raise ValueError(f"unknown model type {kind!r}; expected one of {list(MODEL_TYPES)}")
+    return model.fit(X, y)
+
+def model_path(kind: str, model_dir: str = MODEL_DIR) -> str:
+    return os.path.join(model_dir, f"{kind}-{TRAINING_ROWS}-{TRAINING_SEED}.joblib")
+
+def load_model(kind: str, model_dir: str = MODEL_DIR):
+    """Returns the fitted model of type ``kind``, training and saving it on first use.
+
+    ``"baseline"`` returns ``None``, which ``score`` treats as the formula.
+    """
+    if kind == "baseline":
+        return None
+    import joblib
+
+    path = model_path(kind, model_dir)
+    if os.path.exists(path):
+        return joblib.load(path)
+    model = train_model(kind, *training_data())
+    os.makedirs(model_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
+    return model
+
+# --- ONLINE LEARNING ---
+
+@dataclass
+class OnlineStep:
+    """One ``OnlineFraudModel.update``: batch size, update time and rolling metrics."""
+    batch: int
+    rows: int
+    update_seconds: float
+    precision: float
+    recall: float
+
+class OnlineFraudModel:
+    """Logistic regression trained by SGD one mini-batch at a time.
+
+    ``update`` first scores the incoming batch (test-then-train) to keep
+    rolling precision and recall over the last ``window`` batches, then folds
+    it into a running ``StandardScaler`` and ``SGDClassifier`` with
+    ``partial_fit``. No past rows are kept, so memory and time per update
+    depend only on the batch size. Has ``predict_proba`` so ``score`` can use it.
+    """
+
+    def __init__(self, window: int = 20, seed: int = TRAINING_SEED):
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.preprocessing import StandardScaler
+
+        self.scaler = StandardScaler()
+        self.classifier = SGDClassifier(loss="log_loss", random_state=seed)
+        self.batches = 0
+        self.rows = 0
+        self._confusion = deque(maxlen=window)  # (true positives, false positives, false negatives)
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.classifier.predict_proba(self.scaler.transform(as_features(X)))
+
+    def update(self, X, y) -> OnlineStep:
+        X, y = as_features(X), np.asarray(y, dtype=int)
+        if self.batches:
+            predicted = self.predict_proba(X)[:, 1] > 0.5
+            self._confusion.append((int((predicted & (y == 1)).sum()), int((predicted & (y == 0)).sum()),
+                                    int((~predicted & (y == 1)).sum())))
+        started = time.perf_counter()
+        self.scaler.partial_fit(X)
+        self.classifier.partial_fit(self.scaler.transform(X), y, classes=[0, 1])
+        elapsed = time.perf_counter() - started
+        self.batches += 1
+        self.rows += len(X)
+        tp, fp, fn = np.sum(self._confusion, axis=0).tolist() if self._confusion else (0, 0, 0)
+        return OnlineStep(self.batches, len(X), elapsed, tp / (tp + fp) if tp + fp else 0.0,
+                          tp / (tp + fn) if tp + fn else 0.0)
+
+def labelled_batches(src=None, batch_rows: int = 10_000, n_batches: int = 100, fraud_rate: float | None = None,
+                     seed: int = 42):
+    """Yields ``(X, y)`` mini-batches from a CSV with ``FEATURES`` and ``Label`` columns or, without ``src``,
+    from ``synthetic_chunks``; at most ``n_batches`` are read."""
+    if src is None:
+        chunks = synthetic_chunks(batch_rows * n_batches, fraud_rate, seed, chunk_rows=batch_rows)
+    else:
+        chunks = pd.read_csv(src, chunksize=batch_rows)
+    for i, chunk in enumerate(chunks):
+        if i >= n_batches:
+            break
+        if i == 0:
+            require_columns(chunk, FEATURES + ["Label"])
+        yield as_features(chunk), chunk["Label"].to_numpy()
+
+# --- BATCH SCORING ---
+
+@dataclass
+class BatchStats:
+    """Totals from ``score_csv``."""
+    rows: int = 0
+    flagged: int = 0
+    review: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+def score_csv(src, dst, chunk_rows: int = SCORE_CHUNK_ROWS, on_chunk=None, model=None) -> BatchStats:
+    """Scores a CSV of ``FEATURES`` columns chunk by chunk, writing it with ``Fraud_Prob`` and ``Risk`` appended.
+
+    ``src`` and ``dst`` are paths or file objects; at most ``chunk_rows``
+    rows are held in memory at once. ``on_chunk(stats)`` is called after
+    every chunk, e.g. to drive a progress display.
+    """
+    stats = BatchStats()
+    started = time.perf_counter()
+    for i, chunk in enumerate(pd.read_csv(src, chunksize=chunk_rows)):
+        if i == 0:
+            require_columns(chunk, FEATURES)
+        prob = score(chunk, model)
+        level = risk_level(prob)
+        chunk["Fraud_Prob"] = prob
+        chunk["Risk"] = level
+        chunk.to_csv(dst, index=False, header=i == 0, mode="w" if i == 0 else "a")
+        stats.rows += len(chunk)
+        stats.flagged += int((level == "FLAGGED").sum())
+        stats.review += int((level == "Review").sum())
+        stats.elapsed = time.perf_counter() - started
+        if on_chunk is not None:
+            on_chunk(stats)
+    return stats
+
+# --- LATENCY ---
+
+class LatencyRecorder:
+    """Fixed-size ring buffer of call latencies in seconds.
+
+    Only the most recent ``capacity`` samples are kept, so memory stays
+    constant however long the app runs. Safe to share across sessions.
+    """
+
+    def __init__(self, capacity: int = LATENCY_BUFFER_SIZE):
+        self._samples = np.zeros(capacity)
+        self._next = 0
+        self.count = 0  # samples ever recorded
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples[self._next] = seconds
+            self._next = (self._next + 1) % len(self._samples)
+            self.count += 1
+
+    @contextmanager
+    def measure(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(time.perf_counter() - started)
+
+    def samples(self) -> np.ndarray:
+        with self._lock:
+            return self._samples[:min(self.count, len(self._samples))].copy()
+
+    def percentiles(self, q=(50, 95, 99)) -> dict:
+        """``{q: seconds}`` over the buffered samples; empty before the first call."""
+        samples = self.samples()
+        if not len(samples):
+            return {}
+        return dict(zip(q, np.percentile(samples, q).tolist()))
+
+def benchmark_latency(n_calls: int = 1000, batch_size: int = 1000, seed: int = 0, model=None) -> dict:
+    """Per-call latencies in seconds of ``n_calls`` single-row and ``n_calls`` batched ``score`` calls."""
+    rng = np.random.default_rng(seed)
+    rows = synthetic_batch(rng, batch_size)[FEATURES].to_numpy(dtype=np.float64)
+    timings = {"single": np.empty(n_calls), "batch": np.empty(n_calls)}
+    for i in range(n_calls):
+        x = rows[i % batch_size:i % batch_size + 1]
+        started = time.perf_counter()
+        score(x, model)
+        timings["single"][i] = time.perf_counter() - started
+    for i in range(n_calls):
+        started = time.perf_counter()
+        score(rows, model)
+        timings["batch"][i] = time.perf_counter() - started
+    return timings
@@ -1,8 +1,13 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import numpy as np
-import math
-from utils import set_theme
+import os
+import tempfile
+import importlib.util
+from utils import set_theme, generate_vrp_data
+import routing
+import fraud
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Projects & Demos", page_icon="🚀", layout="wide")
@@ -39,84 +44,174 @@ st.markdown("""
 **Result**: Achieved a **28% reduction** in total travel distance compared to random routing, directly translating to simulated fuel cost savings.
 """)
 
-# --- HELPERS (VRP) ---
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in km
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
-
-def calculate_route_distance(df, route_indices):
-    dist = 0.0
-    for i in range(len(route_indices) - 1):
-        idx1 = route_indices[i]
-        idx2 = route_indices[i+1]
-        p1 = df.iloc[idx1]
-        p2 = df.iloc[idx2]
-        dist += haversine(p1['lat'], p1['lon'], p2['lat'], p2['lon'])
-    return dist
-
-def solve_greedy(df):
-    unvisited = set(range(1, len(df)))
-    current = 0
-    route = [0]
-    while unvisited:
-        nearest = None
-        min_dist = float('inf')
-        p1 = df.iloc[current]
-        for candidate in unvisited:
-            p2 = df.iloc[candidate]
-            d = haversine(p1['lat'], p1['lon'], p2['lat'], p2['lon'])
-            if d < min_dist:
-                min_dist = d
-                nearest = candidate
-        route.append(nearest)
-        unvisited.remove(nearest)
-        current = nearest
-    return route
-
 # --- VRP DEMO ---
-rng = np.random.RandomState(seed=42)
 center_lat, center_lon = 19.0760, 72.8777
-n_points = 12
-lats = center_lat + rng.normal(0, 0.05, n_points)
-lons = center_lon + rng.normal(0, 0.05, n_points)
+c_size, c_budget = st.columns(2)
+n_points = c_size.select_slider("Delivery stops", [12, 100, 500, 1000, 5000, 20000], value=12)
+time_budget = c_budget.slider("Solver time budget (s)", 1, 30, 5)
+
+@st.cache_resource
+def solver_cache():
+    """Process-wide solver results, persisted under .cache/routing across restarts."""
+    return routing.SolverCache(max_entries=64, cache_dir=".cache/routing")
+
+@st.cache_data
+def vrp_instance(n_points):
+    rng = np.random.RandomState(seed=42)
+    lats = center_lat + rng.normal(0, 0.05, n_points)
+    lons = center_lon + rng.normal(0, 0.05, n_points)
+    dist_before = routing.route_length_fn(routing.pair_distance(None, lats, lons), np.arange(n_points))
+    return lats, lons, dist_before
+
+lats, lons, dist_before = vrp_instance(n_points)
 df_vrp = pd.DataFrame({'lat': lats, 'lon': lons, 'id': range(n_points)})
+route_before = np.arange(n_points)
+
+# Finished solves are served from the cache; otherwise solve in a background
+# thread and let the fragment below poll its best-so-far route. The finished
+# snapshot is kept in the session, since other sessions can evict the shared
+# cache entry at any time.
+cache = solver_cache()
+solver_key = routing.instance_fingerprint("anytime", {"time_budget": time_budget, "seed": 42}, lats, lons)
+if st.session_state.get("vrp_solver_key") != solver_key:
+    if st.session_state.get("vrp_solver") is not None:
+        st.session_state.vrp_solver.cancel()
+    cached = cache.get(solver_key)
+    st.session_state.vrp_snapshot = cached
+    st.session_state.vrp_solver = None if cached is not None else routing.AnytimeSolver(lats, lons, time_budget=time_budget, seed=42).start()
+    st.session_state.vrp_solver_key = solver_key
+    if st.session_state.vrp_solver is not None:
+        st.session_state.vrp_solver.wait(0.3)  # small instances finish before the first paint
+solver = st.session_state.vrp_solver
+if solver is not None:
+    if solver.done and solver.snapshot().stage == "finished":
+        st.session_state.vrp_snapshot = solver.snapshot()
+        cache.put(solver_key, st.session_state.vrp_snapshot)
+        st.session_state.vrp_solver = solver = None
+polling = solver is not None and not solver.done
+
+MAP_ZOOM = 11
+MAP_MARKER_LIMIT = 500  # above this, cluster markers and drop the random baseline line
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def vrp_map_html(map_key, _lats, _lons, _route_before, _route_after):
+    """Rendered folium HTML for one route; ``map_key`` fingerprints the instance and route."""
+    import folium
+    from folium.plugins import FastMarkerCluster
+
+    m = folium.Map(location=[center_lat, center_lon], zoom_start=MAP_ZOOM)
+    coords = np.round(np.column_stack([_lats, _lons]), 5)
+    tolerance = routing.pixel_degrees(MAP_ZOOM)
+
+    def route_line(route, **style):
+        kept = route[routing.simplify_polyline(_lats[route], _lons[route], tolerance)]
+        return folium.PolyLine(coords[kept].tolist(), **style)
+
+    if len(coords) <= MAP_MARKER_LIMIT:
+        for i, (lat, lon) in enumerate(coords.tolist()):
+            folium.CircleMarker(location=[lat, lon], radius=6, color='blue', fill=True, popup=f"Customer {i}").add_to(m)
+        route_line(_route_before, color='red', weight=2.5, opacity=0.7, tooltip="Before (Random)").add_to(m)
+    else:
+        FastMarkerCluster(coords.tolist(), name="Customers").add_to(m)
+    route_line(_route_after, color='#00CC96', weight=4, opacity=0.9, tooltip="After (Optimized)").add_to(m)
+    return m.get_root().render()
+
+@st.fragment(run_every=0.5 if polling else None)
+def vrp_results():
+    snap = solver.snapshot() if solver is not None else st.session_state.vrp_snapshot
+    if polling and snap.done:
+        # One full rerun re-registers this fragment without a poll interval.
+        st.rerun()
+
+    route_after = snap.route if snap.route is not None else route_before
+    dist_after = snap.distance if snap.route is not None else dist_before
+    improvement = ((dist_before - dist_after) / dist_before) * 100
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        try:
+            map_key = routing.instance_fingerprint("map", {"zoom": MAP_ZOOM}, lats, lons, route_after)
+            components.html(vrp_map_html(map_key, lats, lons, route_before, route_after), height=400)
+            if n_points > MAP_MARKER_LIMIT:
+                st.caption(f"Above {MAP_MARKER_LIMIT} stops customers are clustered, the random baseline route "
+                           "is hidden and the route is simplified to screen resolution.")
+        except ImportError:
+            st.error("Folium not installed. Showing Static Map fallback.")
+            st.map(df_vrp)
+        except Exception as e:
+            st.error(f"Map Error: {e}")
+
+    with col2:
+        st.image("https://img.icons8.com/color/96/waypoint-map.png", width=60)
+        st.metric("Optimization", f"{improvement:.1f}%", "Distance Saved")
+        st.caption("Green Line = Genetic Algorithm Result")
+        st.caption(f"{'✅' if snap.done else '⏳'} {snap.stage} · {snap.elapsed:.1f}s · best {dist_after:.1f} km")
+        if not snap.done and st.button("⏹ Stop solver"):
+            solver.cancel()
+        stats = cache.stats()
+        st.caption(f"Solver cache: {stats['hit_rate']:.0%} hit rate · {stats['entries']} results · "
+                   f"{stats['memory_bytes'] / 1024:.0f} KB")
+
+    with st.expander("📉 Convergence"):
+        if snap.history:
+            st.line_chart(pd.DataFrame(snap.history, columns=["Seconds", "Best route (km)"]).set_index("Seconds"),
+                          height=220)
+        if snap.ga_curve:
+            st.caption("Genetic algorithm, best route per generation")
+            st.line_chart(pd.DataFrame({"Best route (km)": snap.ga_curve}), height=220)
+
+vrp_results()
+
+# --- CVRP MODE ---
+VEHICLE_COLORS = ["#00CC96", "#EF553B", "#636EFA", "#FFA15A", "#AB63FA", "#19D3F3", "#FF6692", "#B6E880",
+                  "#FF97FF", "#FECB52"]
 
-route_before = list(range(n_points))
-route_after = solve_greedy(df_vrp)
-dist_before = calculate_route_distance(df_vrp, route_before)
-dist_after = calculate_route_distance(df_vrp, route_after)
-improvement = ((dist_before - dist_after) / dist_before) * 100
+if st.toggle("🚚 Multi-vehicle mode (Capacitated VRP)"):
+    c_n, c_k, c_cap = st.columns(3)
+    n_stops = c_n.slider("Stops", 20, 5000, 200, step=20)
+    n_vehicles = c_k.slider("Vehicles", 2, len(VEHICLE_COLORS), 4)
+    capacity = c_cap.slider("Capacity per vehicle", 50, 5000, 400, step=50)
+
+    df_stops = generate_vrp_data(n_stops, seed=42)
+    cv_lats = np.concatenate([[center_lat], df_stops['lat'].to_numpy()])
+    cv_lons = np.concatenate([[center_lon], df_stops['lon'].to_numpy()])
+    demands = np.concatenate([[0], np.random.RandomState(7).randint(1, 10, n_stops)])
+
+    cvrp_key = routing.instance_fingerprint("cvrp", {"n_vehicles": n_vehicles, "capacity": capacity, "depot": 0,
+                                                     "time_budget": 5.0}, cv_lats, cv_lons, demands)
+    cvrp = cache.get_or_solve(cvrp_key, lambda: routing.solve_cvrp(cv_lats, cv_lons, demands, n_vehicles, capacity,
+                                                                   depot=0, time_budget=5.0))
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Total Distance", f"{cvrp.total_distance:.1f} km")
+    m2.metric("Solve Time", f"{cvrp.elapsed * 1000:.0f} ms")
+    m3.metric("Unassigned Stops", len(cvrp.unassigned))
+    if len(cvrp.unassigned):
+        st.warning(f"Fleet capacity {n_vehicles * capacity} < total demand {int(demands.sum())}; "
+                   f"{len(cvrp.unassigned)} stops could not be served.")
 
-col1, col2 = st.columns([3, 1])
-with col1:
     try:
         import folium
         from streamlit_folium import st_folium
-        m = folium.Map(location=[center_lat, center_lon], zoom_start=11)
-        for i, row in df_vrp.iterrows():
-            folium.CircleMarker(
-                location=[row['lat'], row['lon']], radius=6, color='blue', fill=True, popup=f"Customer {row['id']}"
-            ).add_to(m)
-        points_before = [ [df_vrp.iloc[i]['lat'], df_vrp.iloc[i]['lon']] for i in route_before ]
-        folium.PolyLine(points_before, color='red', weight=2.5, opacity=0.7, tooltip="Before (Random)").add_to(m)
-        points_after = [ [df_vrp.iloc[i]['lat'], df_vrp.iloc[i]['lon']] for i in route_after ]
-        folium.PolyLine(points_after, color='#00CC96', weight=4, opacity=0.9, tooltip="After (Optimized)").add_to(m)
-        st_folium(m, width=700, height=400)
+        m_cv = folium.Map(location=[center_lat, center_lon], zoom_start=12)
+        folium.Marker([center_lat, center_lon], tooltip="Depot", icon=folium.Icon(color="black")).add_to(m_cv)
+        for v, route in enumerate(cvrp.routes):
+            if len(route) < 2:
+                continue
+            tour = np.append(route, route[0])
+            folium.PolyLine(np.column_stack([cv_lats[tour], cv_lons[tour]]).tolist(),
+                            color=VEHICLE_COLORS[v], weight=3, opacity=0.9,
+                            tooltip=f"Vehicle {v + 1}: {cvrp.loads[v]:.0f}/{capacity}").add_to(m_cv)
+        st_folium(m_cv, width=900, height=450, key="cvrp_map")
     except ImportError:
-        st.error("Folium not installed. Showing Static Map fallback.")
-        st.map(df_vrp)
-    except Exception as e:
-        st.error(f"Map Error: {e}")
+        st.map(pd.DataFrame({'lat': cv_lats, 'lon': cv_lons}))
 
-with col2:
-    st.image("https://img.icons8.com/color/96/waypoint-map.png", width=60)
-    st.metric("Optimization", f"{improvement:.1f}%", "Distance Saved")
-    st.caption("Green Line = Genetic Algorithm Result")
+    st.dataframe(pd.DataFrame({
+        "Vehicle": [f"🚚 {v + 1}" for v in range(n_vehicles)],
+        "Stops": [max(len(r) - 1, 0) for r in cvrp.routes],
+        "Load": [f"{load:.0f} / {capacity}" for load in cvrp.loads],
+        "Distance (km)": [round(d, 2) for d in cvrp.distances],
+    }), hide_index=True, use_container_width=True)
 
 st.markdown("---")
 
@@ -129,10 +224,29 @@ tech_badge(["Scikit-Learn", "Real-time Inference", "Low Latency", "Imbalanced Da
 st.markdown("""
 **Situation**: Financial transaction systems require real-time vetting to prevent fraudulent chargebacks, often with <100ms latency requirements.  
 **Task**: Build a lightweight, deployable inference engine to classify transactions as 'Safe' or 'Fraud' based on user behavior vectors.  
-**Action**: Developed a logistic regression baseline (simulated here) emphasizing **inference speed** and precision. Tuned thresholds to handle class imbalance (Fraud < 1%).  
+**Action**: Developed a logistic regression baseline (trained here on synthetic data, alongside a gradient-boosted tree ensemble) emphasizing **inference speed** and precision. Tuned thresholds to handle class imbalance (Fraud < 1%).  
 **Result**: Delivered a prototype API capable of processing mock transactions in **real-time** with adjustable sensitivity.
 """)
 
+@st.cache_resource
+def fraud_model(kind):
+    """Fitted model shared by every session; trained and saved under .cache/fraud on first use."""
+    return fraud.load_model(kind)
+
+@st.cache_resource
+def fraud_latency(kind):
+    """Scoring latencies of every session in this process, per model type."""
+    return fraud.LatencyRecorder()
+
+def format_latency(seconds):
+    if seconds < 1e-6:
+        return f"{seconds * 1e9:.0f} ns"
+    return f"{seconds * 1e6:.0f} µs" if seconds < 1e-3 else f"{seconds * 1e3:.2f} ms"
+
+model_kind = st.radio("Model", list(fraud.MODEL_TYPES), format_func=fraud.MODEL_TYPES.get, horizontal=True)
+with st.spinner("Loading model..."):
+    model = fraud_model(model_kind)
+
 col_f1, col_f2 = st.columns(2)
 
 with col_f1:
@@ -141,42 +255,128 @@ with col_f1:
     v2 = st.slider("Feature V2 (Device Trust)", 0.0, 1.0, 0.4)
     amount = st.slider("Transaction Amount ($)", 0, 20000, 2000)
     
-    def sigmoid(x):
-        return 1 / (1 + math.exp(-x))
-    
-    logit = 4 * (v1 - 0.5) + 3 * (v2 - 0.4) + 0.0003 * (amount - 2000)
-    prob = sigmoid(logit)
+    with fraud_latency(model_kind).measure():
+        prob = fraud.score_one(v1, v2, amount, model)
 
 with col_f2:
     st.subheader("Latency & Risk")
-    st.markdown(f"**Inference Latency:** < 15ms (Cached)")
+    latency = fraud_latency(model_kind).percentiles()
+    st.markdown("**Inference Latency:** " + " · ".join(f"p{q} {format_latency(t)}" for q, t in latency.items())
+                + f" ({fraud_latency(model_kind).count:,} calls)")
     st.markdown(f"**Fraud Probability:** {prob*100:.2f}%")
     
-    bar_color = "green"
-    status = "Safe"
-    if prob > 0.6:
-        bar_color = "red"
-        status = "FLAGGED"
-    elif prob > 0.2:
-        bar_color = "orange"
-        status = "Review"
+    status = fraud.risk_level(prob)
     st.progress(prob)
     if status == "FLAGGED": st.error("⚠️ TRANSACTION FLAGGED")
     elif status == "Review": st.warning("⚠️ MANUAL REVIEW")
     else: st.success("✅ CLEARED")
 
+with st.expander("⏱️ Latency micro-benchmark"):
+    c_calls, c_batch = st.columns(2)
+    n_calls = c_calls.select_slider("Calls per mode", [100, 1000, 10000], value=1000)
+    bench_batch = c_batch.select_slider("Rows per batched call", [100, 1000, 10000], value=1000)
+    if st.button("Run benchmark"):
+        timings = fraud.benchmark_latency(n_calls, bench_batch, model=model)
+        import plotly.graph_objects as go
+
+        fig = go.Figure()
+        for mode, label in (("single", "Single row"), ("batch", f"Batch of {bench_batch:,}")):
+            fig.add_trace(go.Histogram(x=timings[mode] * 1e6, name=label, opacity=0.75, nbinsx=60))
+        fig.update_layout(barmode="overlay", xaxis_title="Latency per call (µs)", yaxis_title="Calls",
+                          xaxis_type="log", height=320, margin=dict(l=0, r=0, t=30, b=0))
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(pd.DataFrame({
+            "Mode": ["Single row", f"Batch of {bench_batch:,}"],
+            **{f"p{q}": [format_latency(np.percentile(timings[m], q)) for m in ("single", "batch")]
+               for q in (50, 95, 99)},
+            "Per row": [format_latency(np.median(timings["single"])),
+                        format_latency(np.median(timings["batch"]) / bench_batch)],
+        }), hide_index=True, use_container_width=True)
+
 # Synthetic Data
 st.markdown("### 💾 Dataset Generator")
-if st.button("Generate Synthetic Training Data (CSV)"):
-    rng_synth = np.random.RandomState(42)
-    n = 500
-    syn_v1 = rng_synth.uniform(0, 1, n)
-    syn_v2 = rng_synth.uniform(0, 1, n)
-    syn_amt = rng_synth.randint(0, 20000, n)
-    syn_logit = 4 * (syn_v1 - 0.5) + 3 * (syn_v2 - 0.4) + 0.0003 * (syn_amt - 2000)
-    syn_prob = 1 / (1 + np.exp(-syn_logit))
-    syn_label = (syn_prob > 0.5).astype(int)
-    
-    df_synth = pd.DataFrame({"V1": syn_v1, "V2": syn_v2, "Amount": syn_amt, "Fraud_Prob": syn_prob, "Label": syn_label})
-    csv = df_synth.to_csv(index=False).encode('utf-8')
-    st.download_button("Download Training Set", csv, "fraud_data.csv", "text/csv")
+formats = ["csv", "parquet"] if importlib.util.find_spec("pyarrow") else ["csv"]
+g_rows, g_rate, g_fmt = st.columns(3)
+# Downloads go through Streamlit's in-memory media store, so the page stops at 1M rows (~64 MB of CSV);
+# fraud.write_synthetic itself streams any size to disk for offline use.
+n_synth = g_rows.select_slider("Rows", [500, 10_000, 100_000, 500_000, 1_000_000], value=500,
+                               format_func=lambda n: f"{n:,}")
+rate_pct = g_rate.select_slider("Fraud rate", ["Model default", 0.1, 0.5, 1.0, 5.0, 10.0], value=1.0,
+                                format_func=lambda r: r if isinstance(r, str) else f"{r}%")
+synth_fmt = g_fmt.radio("Format", formats, format_func=str.upper, horizontal=True)
+if st.button("Generate Synthetic Training Data"):
+    progress = st.progress(0.0)
+    with tempfile.NamedTemporaryFile(suffix=f".{synth_fmt}", delete=False) as out:
+        pass
+
+    def show_generation(stats):
+        progress.progress(stats.rows / n_synth,
+                          text=f"{stats.rows:,} rows · {stats.rows_per_second:,.0f} rows/s")
+
+    synth = fraud.write_synthetic(out.name, n_synth, synth_fmt,
+                                  fraud_rate=None if isinstance(rate_pct, str) else rate_pct / 100,
+                                  on_chunk=show_generation)
+    st.caption(f"Generated {synth.rows:,} rows ({synth.frauds / synth.rows:.2%} fraud) in {synth.elapsed:.2f}s "
+               f"· {synth.rows_per_second:,.0f} rows/s · {os.path.getsize(out.name) / 2 ** 20:,.1f} MB")
+    mime = "text/csv" if synth_fmt == "csv" else "application/octet-stream"
+    with open(out.name, "rb") as f:
+        st.download_button("Download Training Set", f, f"fraud_data.{synth_fmt}", mime)
+    os.remove(out.name)
+
+# Batch scoring
+st.markdown("### 📦 Batch Scoring")
+uploaded = st.file_uploader("Upload transactions (CSV with V1, V2, Amount columns)", type="csv")
+if uploaded is not None and st.button("Score batch"):
+    progress = st.empty()
+
+    def show_progress(stats):
+        progress.caption(f"Scored {stats.rows:,} rows · {stats.rows_per_second:,.0f} rows/s")
+
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as scored:
+        try:
+            batch = fraud.score_csv(uploaded, scored, on_chunk=show_progress, model=model)
+        except ValueError as e:
+            st.error(str(e))
+            batch = None
+    if batch is not None:
+        b1, b2, b3 = st.columns(3)
+        b1.metric("Rows Scored", f"{batch.rows:,}")
+        b2.metric("Throughput", f"{batch.rows_per_second:,.0f} rows/s")
+        b3.metric("Flagged / Review", f"{batch.flagged:,} / {batch.review:,}")
+        with open(scored.name, "rb") as f:
+            st.download_button("Download Scored CSV", f, f"scored_{uploaded.name}", "text/csv")
+    os.remove(scored.name)
+
+# Online learning
+with st.expander("🔁 Online learning over a transaction stream"):
+    o_src, o_batch, o_n, o_rate = st.columns(4)
+    sources = ["Synthetic stream"] + (["Uploaded CSV"] if uploaded is not None else [])
+    stream_src = o_src.radio("Source", sources)
+    batch_rows = o_batch.select_slider("Batch size", [1_000, 10_000, 100_000], value=10_000,
+                                       format_func=lambda n: f"{n:,}")
+    n_batches = o_n.slider("Batches", 10, 500, 100, step=10)
+    stream_rate = o_rate.select_slider("Stream fraud rate", [0.1, 0.5, 1.0, 5.0, 10.0], value=1.0,
+                                       format_func=lambda r: f"{r}%", disabled=stream_src != "Synthetic stream")
+    if st.button("Start stream"):
+        online = fraud.OnlineFraudModel()
+        if stream_src == "Uploaded CSV":
+            uploaded.seek(0)
+            batches = fraud.labelled_batches(uploaded, batch_rows, n_batches)
+        else:
+            batches = fraud.labelled_batches(None, batch_rows, n_batches, fraud_rate=stream_rate / 100)
+        status_line, metrics_chart, latency_chart = st.empty(), st.empty(), st.empty()
+        steps = []
+        try:
+            for X, y in batches:
+                steps.append(online.update(X, y))
+                if len(steps) % 10 == 0 or len(steps) == n_batches:
+                    history = pd.DataFrame(steps).set_index("batch")
+                    status_line.caption(f"{online.rows:,} rows in {len(steps)} batches · update p50 "
+                                        f"{format_latency(history['update_seconds'].median())}, max "
+                                        f"{format_latency(history['update_seconds'].max())}")
+                    metrics_chart.line_chart(history[["precision", "recall"]], height=220)
+                    latency_chart.line_chart(history["update_seconds"].rename("Update (ms)") * 1000, height=160)
+        except ValueError as e:
+            st.error(str(e))
+        st.caption("Precision and recall are measured on each batch before training on it, over the last "
+                   "20 batches. Only the scaler statistics and model coefficients are kept between batches.")
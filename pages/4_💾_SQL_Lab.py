@@ -1,7 +1,9 @@
 import streamlit as st
+import uuid
 import sqlite3
 import pandas as pd
 from utils import set_theme
+import sql_lab
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="SQL Lab", page_icon="💾", layout="wide")
@@ -25,64 +27,162 @@ This sandbox runs a real in-memory SQLite database.
 """)
 
 # --- SETUP DATABASE ---
-# Create connection
-conn = sqlite3.connect(":memory:")
-c = conn.cursor()
-
-# Create Table matching PROMPT: id, company, role, status, gpa_cutoff
-c.execute('''
-    CREATE TABLE internship_applications (
-        id INTEGER PRIMARY KEY,
-        company TEXT,
-        role TEXT,
-        status TEXT,
-        gpa_cutoff REAL
-    )
-''')
-
-# Seed Data
-seed_data = [
-    (1, "Google", "SDE Intern", "Interview", 9.0),
-    (2, "Microsoft", "ML Intern", "Applied", 8.5),
-    (3, "Amazon", "SDE Intern", "Applied", 8.0),
-    (4, "Uber", "Backend Intern", "Rejected", 8.5),
-    (5, "Atlassian", "SDE Intern", "Offer", 8.5),
-    (6, "Sprinklr", "Product Engineer", "Applied", 8.0),
-    (7, "Media.net", "SDE Intern", "Interview", 8.2),
-]
-
-c.executemany('INSERT INTO internship_applications VALUES (?,?,?,?,?)', seed_data)
-conn.commit()
+@st.cache_resource
+def session_databases():
+    """Seeded template built once per process; each session works on its own copy."""
+    return sql_lab.SessionDatabases()
+
+databases = session_databases()
+if "sql_session_id" not in st.session_state:
+    st.session_state.sql_session_id = uuid.uuid4().hex
+conn = databases.connect(st.session_state.sql_session_id)
+
+def format_bytes(n):
+    return f"{n / 2 ** 20:,.1f} MB" if n >= 2 ** 20 else f"{n / 1024:.0f} KB"
 
 # --- INTERFACE ---
 col1, col2 = st.columns([1, 2])
 
 with col1:
-    st.info("Available Table: `internship_applications`")
-    st.code("""
-CREATE TABLE internship_applications (
-    id INTEGER PRIMARY KEY,
-    company TEXT,
-    role TEXT,
-    status TEXT,
-    gpa_cutoff REAL
-)
-    """, language="sql")
+    st.info("Available Tables: " + ", ".join(f"`{t}`" for t in sql_lab.list_tables(conn)))
+    st.code(sql_lab.SCHEMA, language="sql")
     
     st.write("**Goal:** Filter applications where GPA cutoff is less than 8.5.")
 
+    st.button("↺ Reset my database", on_click=databases.reset, args=(st.session_state.sql_session_id,))
+    stats = databases.stats()
+    st.caption(f"Your database: {format_bytes(sql_lab.database_bytes(conn))} · "
+               f"{stats['sessions']} active session(s) using {format_bytes(stats['total_bytes'])} · "
+               f"idle sessions are closed after {sql_lab.SESSION_IDLE_TTL // 60} min")
+
 with col2:
     # Default query from PROMPT
     default_query = "SELECT * FROM internship_applications WHERE gpa_cutoff < 8.5"
     query = st.text_area("SQL Query", value=default_query, height=150)
     
     if st.button("Run Query", type="primary"):
+        previous = st.session_state.pop("sql_result", None)
+        if previous is not None:
+            previous.close()
+        st.session_state.sql_page = 0
         try:
             # Run query
-            df = pd.read_sql_query(query, conn)
+            st.session_state.sql_result = sql_lab.PagedQuery(conn, query)
             st.success("Query Executed Successfully!")
-            st.dataframe(df, use_container_width=True)
+        except sql_lab.QueryTimeout as e:
+            st.error(f"⏱️ {e} Try adding a WHERE clause or a LIMIT.")
         except Exception as e:
             st.error(f"Syntax Error: {e}")
 
+    result = st.session_state.get("sql_result")
+    if result is not None:
+        if result.columns is None:
+            if result.rowcount >= 0:
+                st.caption(f"{result.rowcount} row(s) affected.")
+        else:
+            try:
+                rows = result.page(st.session_state.sql_page)
+            except sql_lab.QueryTimeout as e:
+                st.error(f"⏱️ {e} Showing the rows fetched so far.")
+                rows = result.rows[st.session_state.sql_page * result.page_rows:]
+            except sqlite3.Error as e:
+                st.error(f"Result no longer available: {e}")
+                rows = []
+            st.dataframe(pd.DataFrame(rows, columns=result.columns), use_container_width=True)
+
+            def turn_page(step):
+                st.session_state.sql_page += step
+
+            more = not result.exhausted or st.session_state.sql_page + 1 < result.pages_loaded
+            p_prev, p_label, p_next = st.columns([1, 2, 1])
+            p_prev.button("◀ Previous", on_click=turn_page, args=(-1,), disabled=st.session_state.sql_page == 0)
+            p_label.caption(f"Page {st.session_state.sql_page + 1} of {result.pages_loaded}{'+' if more else ''}")
+            p_next.button("Next ▶", on_click=turn_page, args=(1,), disabled=not more)
+            if result.capped:
+                st.warning(f"Result truncated at {sql_lab.ROW_CAP:,} rows.")
+        st.caption(f"⏱️ {result.elapsed * 1000:.1f} ms · ≈{result.vm_steps:,} VM steps · "
+                   f"{len(result.rows):,} rows fetched (rows scanned is not exposed by Python's sqlite3; "
+                   f"VM steps approximate the work done)")
+
+# --- LARGE DATASET MODE ---
+def close_open_result():
+    """Closes the paginated Run Query cursor; while open it locks the tables it reads from."""
+    open_result = st.session_state.pop("sql_result", None)
+    if open_result is not None:
+        open_result.close()
+
+def drop_index_clicked(name):
+    close_open_result()
+    try:
+        sql_lab.drop_index(conn, name)
+    except sqlite3.Error as e:
+        st.session_state.sql_index_error = f"Could not drop `{name}`: {e}"
+
+if st.toggle("🏋️ Large dataset mode"):
+    st.markdown("Seed your database with millions of rows, add indexes, and compare query plans and timings.")
+    l_rows, l_seed = st.columns([3, 1])
+    n_large = l_rows.select_slider("Applications", [100_000, 500_000, 1_000_000, 2_000_000, 5_000_000],
+                                   value=1_000_000, format_func=lambda n: f"{n:,}")
+    if l_seed.button("Seed database", use_container_width=True):
+        close_open_result()
+        with st.spinner(f"Inserting {n_large:,} applications..."):
+            seeded = sql_lab.seed_large(conn, n_large)
+        st.session_state.sql_profiles = []
+        st.success(f"Inserted {seeded.rows:,} rows across 3 tables in {seeded.elapsed:.2f}s "
+                   f"({seeded.rows_per_second:,.0f} rows/s) · database is now "
+                   f"{format_bytes(sql_lab.database_bytes(conn))}")
+    with st.expander("Related tables"):
+        st.code(";\n\n".join(sql_lab.RELATED_SCHEMA), language="sql")
+
+    i_create, i_list = st.columns(2)
+    with i_create:
+        st.markdown("**Create index**")
+        index_table = st.selectbox("Table", sql_lab.list_tables(conn))
+        index_columns = st.multiselect("Columns (in order)", sql_lab.table_columns(conn, index_table))
+        if st.button("Create index", disabled=not index_columns):
+            close_open_result()
+            try:
+                with st.spinner("Building index..."):
+                    name, build_s = sql_lab.create_index(conn, index_table, index_columns)
+                st.success(f"Created `{name}` in {build_s * 1000:,.0f} ms")
+            except (ValueError, sqlite3.Error) as e:
+                st.error(str(e))
+    with i_list:
+        st.markdown("**Indexes**")
+        indexes = sql_lab.list_indexes(conn)
+        if not indexes:
+            st.caption("No indexes yet (primary keys aside).")
+        for name, ddl in indexes:
+            d_sql, d_btn = st.columns([4, 1])
+            d_sql.code(ddl, language="sql")
+            d_btn.button("Drop", key=f"drop_{name}", on_click=drop_index_clicked, args=(name,))
+        if "sql_index_error" in st.session_state:
+            st.error(st.session_state.pop("sql_index_error"))
+
+    st.markdown("**Query plan profiler**")
+    profile_sql = st.text_area("Query to profile", height=100, value=(
+        "SELECT company, COUNT(*) FROM internship_applications\n"
+        "WHERE status = 'Offer' AND gpa_cutoff < 7\nGROUP BY company"))
+    st.caption("Profile once, create an index (e.g. on status, gpa_cutoff), then profile again to compare.")
+    if st.button("Profile query"):
+        try:
+            profiled = sql_lab.profile_query(conn, profile_sql)
+            st.session_state.sql_profiles = (st.session_state.get("sql_profiles", []) + [profiled])[-2:]
+        except sql_lab.QueryTimeout as e:
+            st.error(f"⏱️ {e}")
+        except sqlite3.Error as e:
+            st.error(f"Syntax Error: {e}")
+
+    profiles = st.session_state.get("sql_profiles", [])
+    for column, run, label in zip(st.columns(2), profiles, ["Previous run", "Latest run"][-len(profiles):]):
+        with column:
+            st.markdown(f"**{label}**")
+            earlier = profiles[0] if run is profiles[-1] and len(profiles) == 2 else None
+            st.metric("Execution time", f"{run.elapsed * 1000:,.1f} ms",
+                      f"{(run.elapsed - earlier.elapsed) * 1000:+,.1f} ms" if earlier else None,
+                      delta_color="inverse")
+            st.code(run.plan, language="text")
+            st.caption(f"{run.rows:,} rows · ≈{run.vm_steps:,} VM steps · indexes: "
+                       f"{', '.join(run.indexes) or 'none'}")
+
 st.markdown("---")
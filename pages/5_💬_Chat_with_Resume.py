@@ -27,16 +27,25 @@ if not api_key:
         st.divider()
         api_key = st.text_input("🔑 OpenAI API Key", type="password", help="Enter your key to chat.")
         if not api_key:
-            st.warning("Please enter an API Key to activate the chat.")
+            st.info("No API key: answers are quoted offline from the resume text. Add a key for AI answers.")
+
+answer_cache = utils.get_answer_cache()
+if answer_cache:
+    stats = answer_cache.stats()
+    st.sidebar.caption(
+        f"⚡ Answer cache: {stats['exact_hits'] + stats['semantic_hits']} hits / "
+        f"{stats['misses']} misses ({stats['entries']} cached)"
+    )
 
 # 3. Chat Interface
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-# Display History
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+# Bound the history by tokens, then draw only the newest messages
+st.session_state.messages = utils.compact_history(
+    st.session_state.messages, utils.CHAT_HISTORY_TOKEN_BUDGET
+)
+utils.render_chat_history(st.session_state.messages, utils.CHAT_HISTORY_VISIBLE)
 
 # Handle User Input
 if prompt := st.chat_input("Ask me anything... (e.g., 'What is his GPA?')"):
@@ -49,24 +58,39 @@ if prompt := st.chat_input("Ask me anything... (e.g., 'What is his GPA?')"):
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
         message_placeholder.markdown("Thinking...")
-        
-        # Build & Run Chain
-        chain = utils.build_rag_chain(api_key)
-        
-        # Check if chain is a Stub (Fallback)
-        if isinstance(chain, utils.StubChain):
-            response = chain.run(prompt)
-            # Add a small delay for realism if it's a stub
-            time.sleep(0.5)
+        timings = utils.StreamTimings(started=time.perf_counter())
+        latency = None
+
+        cached = answer_cache.lookup(prompt) if answer_cache else None
+
+        if cached is not None:
+            response = cached
+            latency = f"⚡ Cached answer in {(time.perf_counter() - timings.started) * 1000:.1f} ms"
         else:
-            try:
-                # Run the actual RAG chain
-                res = chain.invoke(prompt)
-                response = res['result']
-            except Exception as e:
-                response = f"❌ Error: {str(e)}"
+            # Fetch (or build once) the pooled chain for this key
+            chain = utils.get_rag_chain(api_key)
+
+            # Check if chain is a Stub (Fallback)
+            if isinstance(chain, utils.StubChain):
+                response = chain.run(prompt)
+                # Add a small delay for realism if it's a stub
+                time.sleep(0.5)
+            else:
+                try:
+                    # Stream tokens into the placeholder as they arrive
+                    response = ""
+                    for piece in utils.stream_answer(chain, prompt, timings):
+                        response += piece
+                        message_placeholder.markdown(response + "▌")
+                    latency = f"⏱️ First token {timings.ttft_ms or 0:.0f} ms · total {timings.total_ms:.0f} ms"
+                    if answer_cache and not getattr(chain, "offline", False):
+                        answer_cache.store(prompt, response)
+                except Exception as e:
+                    response = f"❌ Error: {str(e)}"
 
         message_placeholder.markdown(response)
+        if latency:
+            st.caption(latency)
     
     # Add Assistant Message to History
-    st.session_state.messages.append({"role": "assistant", "content": response})
+    st.session_state.messages.append({"role": "assistant", "content": response, "latency": latency})
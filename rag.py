@@ -0,0 +1,392 @@
+"""Retrieval building blocks for the Chat with Resume page.
+
+Everything here runs locally; ``utils.build_rag_chain`` wires these pieces
+together with the OpenAI clients when a key is available.
+"""
+import re
+import math
+import time
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any
+
+import numpy as np
+import scipy.sparse as sp
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+EMBEDDING_BACKENDS = ("openai", "local")
+DEFAULT_EMBEDDING_BACKEND = "openai"
+
+# --- LOCAL EMBEDDINGS ---
+
+class LocalHashingEmbeddings(Embeddings):
+    """Dense float32 embeddings computed offline from hashed words.
+
+    Text is hashed into a sparse term-frequency vector and projected to
+    ``n_components`` dimensions by a seeded sparse sign projection in which
+    every hashed feature contributes to ``nnz_per_feature`` output dimensions.
+    Both steps are stateless, so a persisted FAISS index and freshly embedded
+    queries always agree without storing a fitted model next to the index.
+    """
+
+    def __init__(self, n_features: int = 2 ** 16, n_components: int = 768, nnz_per_feature: int = 8,
+                 seed: int = 42, batch_size: int = 512):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.n_features = n_features
+        self.n_components = n_components
+        self.nnz_per_feature = nnz_per_feature
+        self.seed = seed
+        self.batch_size = batch_size
+        self._vectorizer = HashingVectorizer(
+            n_features=n_features, stop_words="english", alternate_sign=False, norm="l2", dtype=np.float32
+        )
+        rng = np.random.default_rng(seed)
+        cols = rng.integers(0, n_components, size=(n_features, nnz_per_feature))
+        signs = rng.choice(np.array([-1.0, 1.0], dtype=np.float32), size=(n_features, nnz_per_feature))
+        self._projection = sp.csr_matrix(
+            (signs.ravel() / np.sqrt(nnz_per_feature), cols.ravel(),
+             np.arange(0, n_features * nnz_per_feature + 1, nnz_per_feature)),
+            shape=(n_features, n_components), dtype=np.float32,
+        )
+
+    @property
+    def embedding_id(self) -> str:
+        """Identifier used to key on-disk indexes built with these settings."""
+        return (f"local-hashing-{self.n_features}-{self.n_components}"
+                f"-{self.nnz_per_feature}-{self.seed}")
+
+    def sparse(self, texts: list[str]) -> sp.csr_matrix:
+        """L2-normalized hashed term frequencies, before projection."""
+        return self._vectorizer.transform(texts)
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        """Embeds ``texts`` into an L2-normalized ``(len(texts), n_components)`` float32 array."""
+        out = np.empty((len(texts), self.n_components), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            dense = (self.sparse(batch) @ self._projection).toarray()
+            out[start:start + len(batch)] = dense
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_array(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_array([text])[0].tolist()
+
+def make_embeddings(backend: str, api_key: str | None = None, http_client=None):
+    """Returns ``(embeddings, embedding_id)`` for the configured backend."""
+    backend = (backend or DEFAULT_EMBEDDING_BACKEND).lower().strip()
+    if backend == "local":
+        embeddings = LocalHashingEmbeddings()
+        return embeddings, embeddings.embedding_id
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        from utils import OPENAI_EMBEDDING_MODEL
+
+        embeddings = OpenAIEmbeddings(
+            openai_api_key=api_key, model=OPENAI_EMBEDDING_MODEL, http_client=http_client
+        )
+        return embeddings, OPENAI_EMBEDDING_MODEL
+    raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of {EMBEDDING_BACKENDS}.")
+
+# --- LEXICAL + HYBRID RETRIEVAL ---
+
+_TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens used by the lexical index."""
+    return _TOKEN_RE.findall(text.lower())
+
+class BM25Index:
+    """In-memory inverted index over a fixed list of documents with Okapi BM25 scoring.
+
+    Postings are stored per term as parallel NumPy arrays of document ids and
+    term frequencies, so scoring a query touches only the documents that
+    contain one of its terms.
+    """
+
+    def __init__(self, documents: list, k1: float = 1.5, b: float = 0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+
+        postings = defaultdict(lambda: ([], []))
+        doc_len = np.zeros(len(self.documents), dtype=np.float32)
+        for doc_id, doc in enumerate(self.documents):
+            counts = Counter(tokenize(doc.page_content))
+            doc_len[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                ids, tfs = postings[term]
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        n_docs = len(self.documents)
+        avgdl = float(doc_len.mean()) if n_docs else 0.0
+        # Per-document length normalisation is query independent, so fold it in once.
+        self._norm = k1 * (1 - b + b * doc_len / avgdl) if avgdl else np.full(n_docs, k1, dtype=np.float32)
+        self._postings = {}
+        for term, (ids, tfs) in postings.items():
+            idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            self._postings[term] = (np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.float32), idf)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._postings
+
+    def search(self, query: str, k: int = 4) -> list[tuple[int, float]]:
+        """Returns up to ``k`` ``(doc_index, score)`` pairs with a positive score, best first."""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(tokenize(query)):
+            entry = self._postings.get(term)
+            if entry is None:
+                continue
+            ids, tfs, idf = entry
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[ids])
+        hits = np.flatnonzero(scores)
+        if hits.size == 0:
+            return []
+        top = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def covers(self, query: str, doc_index: int) -> bool:
+        """True if every content word of ``query`` is indexed and occurs in ``doc_index``."""
+        terms = content_terms(query)
+        if not terms:
+            return False
+        for term in terms:
+            entry = self._postings.get(term)
+            if entry is None or doc_index not in entry[0]:
+                return False
+        return True
+
+def content_terms(query: str) -> set[str]:
+    """Query tokens with English stop words removed."""
+    return {t for t in tokenize(query) if t not in ENGLISH_STOP_WORDS}
+
+def reciprocal_rank_fusion(rankings: list[list], k: int = 60) -> list:
+    """Fuses several best-first rankings of hashable keys with RRF, best first."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+class HybridRetriever(BaseRetriever):
+    """BM25 + vector retriever fused with reciprocal rank fusion.
+
+    Short keyword questions whose terms all land in a single clearly-best
+    chunk are answered from the lexical index alone, skipping the query
+    embedding call and the FAISS search.
+    """
+
+    vectorstore: Any
+    bm25: Any
+    k: int = 4
+    rrf_k: int = 60
+    fast_path_max_terms: int = 3
+    fast_path_margin: float = 1.5
+
+    def lexical_fast_path(self, query: str, hits: list[tuple[int, float]]) -> bool:
+        """Whether the lexical hits alone are trustworthy enough to skip vector search."""
+        if not hits or len(content_terms(query)) > self.fast_path_max_terms:
+            return False
+        top_index, top_score = hits[0]
+        if not self.bm25.covers(query, top_index):
+            return False
+        return len(hits) == 1 or top_score >= self.fast_path_margin * hits[1][1]
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> list:
+        lexical_hits = self.bm25.search(query, k=2 * self.k)
+        if self.lexical_fast_path(query, lexical_hits):
+            return [self.bm25.documents[i] for i, _ in lexical_hits[:self.k]]
+
+        vector_docs = self.vectorstore.similarity_search(query, k=2 * self.k)
+        by_content = {d.page_content: d for d in vector_docs}
+        for i, _ in lexical_hits:
+            by_content.setdefault(self.bm25.documents[i].page_content, self.bm25.documents[i])
+        fused = reciprocal_rank_fusion(
+            [[self.bm25.documents[i].page_content for i, _ in lexical_hits],
+             [d.page_content for d in vector_docs]],
+            k=self.rrf_k,
+        )
+        return [by_content[content] for content in fused[:self.k]]
+
+def vectorstore_documents(vectorstore) -> list:
+    """Documents held by a FAISS store, in index order."""
+    return [vectorstore.docstore.search(doc_id) for doc_id in vectorstore.index_to_docstore_id.values()]
+
+# --- ANSWER CACHE ---
+
+def normalize_query(query: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form of a question."""
+    return " ".join(tokenize(query))
+
+class SemanticAnswerCache:
+    """Caches answers by normalized question text, then by embedding similarity.
+
+    A lookup first tries an exact match on the normalized question and then
+    the nearest cached question by cosine similarity; anything at or above
+    ``threshold`` is served from the cache. Entries are evicted least
+    recently used first and expire ``ttl`` seconds after they were stored.
+    """
+
+    def __init__(self, embeddings=None, threshold: float = 0.85, max_entries: int = 256,
+                 ttl: float | None = 24 * 3600, resume_hash: str | None = None):
+        self.embeddings = embeddings or LocalHashingEmbeddings()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.resume_hash = resume_hash
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # normalized question -> (answer, vector, stored_at)
+        self._matrix = None  # stacked vectors in _entries order, rebuilt lazily
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        if self.ttl is None:
+            return
+        stale = [key for key, (_, _, stored_at) in self._entries.items() if now - stored_at > self.ttl]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._matrix = None
+
+    def lookup(self, query: str) -> str | None:
+        """Returns a cached answer for ``query`` (or a close paraphrase), else ``None``."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return self._entries[key][0]
+            if not self._entries:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._matrix = np.stack([vector for _, vector, _ in self._entries.values()])
+            keys = list(self._entries)
+            matrix = self._matrix
+
+        # Vectors are unit length, so a dot product is the cosine similarity.
+        similarities = matrix @ self.embeddings.embed_array([query])[0]
+        best = int(np.argmax(similarities))
+        with self._lock:
+            if similarities[best] >= self.threshold and keys[best] in self._entries:
+                self._entries.move_to_end(keys[best])
+                self.semantic_hits += 1
+                return self._entries[keys[best]][0]
+            self.misses += 1
+            return None
+
+    def store(self, query: str, answer: str):
+        vector = self.embeddings.embed_array([query])[0]
+        key = normalize_query(query)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (answer, vector, time.time())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.semantic_hits
+        total = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+
+# --- OFFLINE ANSWERS ---
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+|\s*[•▪●]\s*")
+
+def split_sentences(text: str, min_words: int = 2) -> list[str]:
+    """Splits resume text into sentences and bullet lines."""
+    parts = (p.strip(" -*\t") for p in _SENTENCE_SPLIT_RE.split(text))
+    return [p for p in parts if len(p.split()) >= min_words]
+
+class ExtractiveAnswerEngine:
+    """Offline question answering that quotes the most relevant resume sentences.
+
+    Chunks are ranked by fusing BM25 with local-embedding similarity, then the
+    sentences of the best chunks are scored against the question by exact
+    cosine similarity of their hashed term vectors in a single sparse
+    matrix-vector product. Exposes the same ``run``/``invoke`` interface as
+    ``RetrievalQA`` and ``utils.StubChain``.
+    """
+
+    offline = True
+
+    def __init__(self, documents: list, embeddings=None, top_chunks: int = 3, max_sentences: int = 3,
+                 min_score: float = 0.1):
+        self.documents = list(documents)
+        self.embeddings = embeddings or LocalHashingEmbeddings()
+        self.top_chunks = top_chunks
+        self.max_sentences = max_sentences
+        self.min_score = min_score
+        self.bm25 = BM25Index(self.documents)
+        self._chunk_vectors = self.embeddings.embed_array([d.page_content for d in self.documents])
+
+        sentences, owners = [], []
+        for i, doc in enumerate(self.documents):
+            for sentence in split_sentences(doc.page_content):
+                sentences.append(sentence)
+                owners.append(i)
+        self._sentences = sentences
+        self._sentence_chunk = np.asarray(owners, dtype=np.int32)
+        self._sentence_terms = self.embeddings.sparse(sentences) if sentences else None
+
+    def retrieve(self, query: str, query_vector: np.ndarray) -> list[int]:
+        """Indices of the best chunks for ``query``, best first."""
+        lexical = [i for i, _ in self.bm25.search(query, k=2 * self.top_chunks)]
+        dense = np.argsort(-(self._chunk_vectors @ query_vector), kind="stable")[:2 * self.top_chunks]
+        return reciprocal_rank_fusion([lexical, dense.tolist()])[:self.top_chunks]
+
+    def run(self, query: str) -> str:
+        if not self._sentences:
+            return "I couldn't find any readable text in the resume."
+        query_vector = self.embeddings.embed_array([query])[0]
+        chunks = self.retrieve(query, query_vector)
+        candidates = np.flatnonzero(np.isin(self._sentence_chunk, chunks))
+        query_terms = self.embeddings.sparse([query])
+        scores = (self._sentence_terms[candidates] @ query_terms.T).toarray().ravel()
+        order = np.argsort(-scores, kind="stable")[:self.max_sentences]
+        best = np.sort(candidates[order[scores[order] >= self.min_score]])
+        if best.size == 0:
+            return "I couldn't find that in the resume. Try asking about education, projects or skills."
+        # Keep resume order so quoted sentences read naturally.
+        return " ".join(self._sentences[i] for i in best)
+
+    def invoke(self, input_data):
+        query = input_data.get("query", "") if isinstance(input_data, dict) else str(input_data)
+        return {"result": self.run(query)}
+
+# --- TEST DOUBLES ---
+
+def fake_streaming_llm(responses: list[str] | None = None, sleep: float = 0.01):
+    """Chat model that streams canned answers character by character, for offline runs."""
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    return FakeListChatModel(
+        responses=responses or ["Parag is a dual degree student at IIT Kharagpur."], sleep=sleep
+    )
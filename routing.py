@@ -0,0 +1,905 @@
+"""Route construction and distance helpers for the VRP demo on the Projects page.
+
+Coordinates are plain latitude/longitude arrays in degrees and distances are
+great-circle kilometres. Routes are integer arrays of point indices that
+start at the depot (index 0).
+"""
+import math
+import os
+import json
+import time
+import pickle
+import hashlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# --- DISTANCES ---
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two points (scalar reference version)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+def haversine_matrix(lats, lons, dtype=np.float64, chunk_size: int = 512) -> np.ndarray:
+    """Pairwise great-circle distances in km as an ``(n, n)`` array of ``dtype``.
+
+    Rows are computed in blocks of ``chunk_size`` with NumPy broadcasting, so
+    temporary memory is ``O(chunk_size * n)`` on top of the result itself.
+    ``dtype=np.float32`` halves both.
+    """
+    lat = np.radians(np.asarray(lats, dtype=dtype))
+    lon = np.radians(np.asarray(lons, dtype=dtype))
+    cos_lat = np.cos(lat)
+    n = lat.shape[0]
+    out = np.empty((n, n), dtype=dtype)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        a = np.sin((lat[start:stop, None] - lat[None, :]) / 2) ** 2
+        a += cos_lat[start:stop, None] * cos_lat[None, :] * np.sin((lon[start:stop, None] - lon[None, :]) / 2) ** 2
+        np.clip(a, 0, 1, out=a)
+        out[start:stop] = (2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(a))
+    return out
+
+@lru_cache(maxsize=4)
+def _cached_distance_matrix(coords: bytes, dtype_name: str) -> np.ndarray:
+    latlon = np.frombuffer(coords, dtype=np.float64).reshape(-1, 2)
+    matrix = haversine_matrix(latlon[:, 0], latlon[:, 1], dtype=np.dtype(dtype_name))
+    matrix.flags.writeable = False  # shared between callers
+    return matrix
+
+def distance_matrix(lats, lons, dtype=np.float64) -> np.ndarray:
+    """Cached, read-only haversine matrix for this exact coordinate set."""
+    coords = np.ascontiguousarray(np.column_stack([lats, lons]), dtype=np.float64)
+    return _cached_distance_matrix(coords.tobytes(), np.dtype(dtype).name)
+
+def route_length(dist: np.ndarray, route, closed: bool = False) -> float:
+    """Length of ``route`` under ``dist``; ``closed`` adds the edge back to the start."""
+    route = np.asarray(route)
+    length = float(dist[route[:-1], route[1:]].sum())
+    if closed and len(route) > 1:
+        length += float(dist[route[-1], route[0]])
+    return length
+
+def unit_vectors(lats, lons) -> np.ndarray:
+    """Points as ``(n, 3)`` unit vectors; chord length orders pairs exactly like great-circle distance."""
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+def pair_distance(dist: np.ndarray | None = None, lats=None, lons=None):
+    """Returns a fast scalar ``d(i, j)`` reading ``dist`` or computing haversine on the fly.
+
+    The on-the-fly variant lets local search run on instances too large for
+    a full ``(n, n)`` matrix.
+    """
+    if dist is not None:
+        return dist.item
+    lat = np.radians(np.asarray(lats, dtype=np.float64)).tolist()
+    lon = np.radians(np.asarray(lons, dtype=np.float64)).tolist()
+    cos_lat = [math.cos(x) for x in lat]
+    sin, asin, sqrt = math.sin, math.asin, math.sqrt
+    diameter = 2 * EARTH_RADIUS_KM
+
+    def d(i, j):
+        a = sin((lat[i] - lat[j]) * 0.5) ** 2 + cos_lat[i] * cos_lat[j] * sin((lon[i] - lon[j]) * 0.5) ** 2
+        return diameter * asin(sqrt(min(a, 1.0)))
+    return d
+
+def route_length_fn(d, route, closed: bool = False) -> float:
+    """Route length using a scalar ``d(i, j)`` from ``pair_distance``."""
+    nodes = [int(x) for x in route]
+    length = sum(d(nodes[i], nodes[i + 1]) for i in range(len(nodes) - 1))
+    if closed and len(nodes) > 1:
+        length += d(nodes[-1], nodes[0])
+    return length
+
+def neighbour_lists(k: int, dist: np.ndarray | None = None, lats=None, lons=None) -> np.ndarray:
+    """The ``k`` nearest other points of every point, nearest first, as an ``(n, k)`` int array.
+
+    Uses a KD-tree over unit vectors when coordinates are given, so no
+    ``(n, n)`` matrix is needed; otherwise partitions the rows of ``dist``.
+    """
+    if lats is not None:
+        from sklearn.neighbors import KDTree
+
+        xyz = unit_vectors(lats, lons)
+        k = min(k, len(xyz) - 1)
+        _, idx = KDTree(xyz).query(xyz, k=k + 1)
+    else:
+        k = min(k, dist.shape[0] - 1)
+        idx = np.argpartition(dist, k, axis=1)[:, :k + 1]
+        idx = np.take_along_axis(idx, np.argsort(np.take_along_axis(dist, idx, axis=1), axis=1), axis=1)
+    # Drop each point itself (normally column 0, but not guaranteed with duplicate points).
+    own = idx == np.arange(len(idx))[:, None]
+    own[own.sum(axis=1) == 0, -1] = True
+    return idx[~own].reshape(len(idx), k)
+
+# --- CONSTRUCTION ---
+
+def solve_greedy(dist: np.ndarray, start: int = 0) -> np.ndarray:
+    """Nearest-neighbour route from ``start``, one vectorized row scan per step."""
+    n = dist.shape[0]
+    visited = np.zeros(n, dtype=bool)
+    route = np.empty(n, dtype=np.intp)
+    row = np.empty(n, dtype=dist.dtype)
+    current = start
+    visited[current] = True
+    route[0] = current
+    for step in range(1, n):
+        np.copyto(row, dist[current])
+        row[visited] = np.inf
+        current = int(np.argmin(row))
+        visited[current] = True
+        route[step] = current
+    return route
+
+class PointGrid:
+    """Uniform grid over unit vectors answering nearest-remaining-point queries.
+
+    Points live in cubic cells of side ``cell_size`` (chord units) and are
+    deleted as they are visited. A query scans shells of cells around the
+    query point and stops once the best hit is closer than anything an
+    unscanned shell could hold; when a shell would have more cells than
+    there are points left, the remaining points are scanned directly.
+    """
+
+    def __init__(self, xyz: np.ndarray, points_per_cell: float = 2.0):
+        n = len(xyz)
+        extent = np.sort(xyz.max(axis=0) - xyz.min(axis=0))
+        # Points usually cover a 2-D patch of the sphere, so size cells by the two largest extents.
+        area = max(extent[1] * extent[2], 1e-18)
+        self.cell_size = max(math.sqrt(area * points_per_cell / max(n, 1)), 1e-9)
+        self.xyz = xyz
+        self._coords = xyz.tolist()
+        keys = np.floor(xyz / self.cell_size).astype(np.int64)
+        self._keys = [tuple(k) for k in keys.tolist()]
+        self._cells = {}
+        for i, key in enumerate(self._keys):
+            self._cells.setdefault(key, []).append(i)
+        self._alive = set(range(n))
+        self._shells = {}
+
+    def __len__(self):
+        return len(self._alive)
+
+    def remove(self, i: int):
+        key = self._keys[i]
+        cell = self._cells[key]
+        cell.remove(i)
+        if not cell:
+            del self._cells[key]
+        self._alive.discard(i)
+
+    def _shell(self, k: int) -> list[tuple]:
+        """Cell offsets at Chebyshev distance exactly ``k``."""
+        if k not in self._shells:
+            span = range(-k, k + 1)
+            self._shells[k] = [(dx, dy, dz) for dx in span for dy in span for dz in span
+                               if max(abs(dx), abs(dy), abs(dz)) == k]
+        return self._shells[k]
+
+    def nearest(self, i: int) -> int:
+        """Index of the closest remaining point to point ``i`` (lowest index on ties), or -1."""
+        if not self._alive:
+            return -1
+        qx, qy, qz = self._coords[i]
+        cx, cy, cz = self._keys[i]
+        best, best_j = math.inf, -1
+        k = 0
+        while True:
+            shell = self._shell(k)
+            if len(shell) > len(self._alive):
+                return self._nearest_brute_force(i)
+            for dx, dy, dz in shell:
+                cell = self._cells.get((cx + dx, cy + dy, cz + dz))
+                if cell is None:
+                    continue
+                for j in cell:
+                    x, y, z = self._coords[j]
+                    dd = (x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2
+                    if dd < best or (dd == best and j < best_j):
+                        best, best_j = dd, j
+            # Every point outside shells 0..k is at least k cells away along some axis.
+            if best_j >= 0 and best <= (k * self.cell_size) ** 2:
+                return best_j
+            k += 1
+
+    def _nearest_brute_force(self, i: int) -> int:
+        candidates = np.fromiter(self._alive, dtype=np.intp, count=len(self._alive))
+        candidates.sort()
+        dd = ((self.xyz[candidates] - self.xyz[i]) ** 2).sum(axis=1)
+        return int(candidates[np.argmin(dd)])
+
+def solve_greedy_spatial(lats, lons, start: int = 0) -> np.ndarray:
+    """Nearest-neighbour route like ``solve_greedy`` but backed by a ``PointGrid``.
+
+    Needs no distance matrix and each step touches only nearby cells, so
+    100k stops take seconds instead of hours. Chord distance between unit
+    vectors orders points exactly like haversine distance, so routes match
+    ``solve_greedy`` (up to floating-point ties).
+    """
+    xyz = unit_vectors(lats, lons)
+    n = len(xyz)
+    grid = PointGrid(xyz)
+    route = np.empty(n, dtype=np.intp)
+    current = start
+    grid.remove(current)
+    route[0] = current
+    for step in range(1, n):
+        current = grid.nearest(current)
+        grid.remove(current)
+        route[step] = current
+    return route
+
+# --- GENETIC ALGORITHM ---
+
+@dataclass
+class SolveResult:
+    """Best route found by a solver plus how it got there."""
+    route: np.ndarray
+    distance: float
+    curve: list = field(default_factory=list)  # best distance after each generation / pass
+    elapsed: float = 0.0
+    iterations: int = 0
+
+def _order_crossover(p1: np.ndarray, p2: np.ndarray, rng) -> np.ndarray:
+    """Batched order crossover (OX) of equally shaped permutation arrays of ``0..L-1``.
+
+    Each child keeps a random slice of ``p1`` in place and fills the other
+    positions with the remaining genes in the order they appear in ``p2``.
+    Rows are independent, yet the whole batch is a handful of array ops:
+    the fill works because boolean assignment walks rows in order and every
+    row has as many free positions as leftover genes.
+    """
+    m, length = p1.shape
+    rows = np.arange(m)[:, None]
+    cols = np.arange(length)[None, :]
+    cuts = np.sort(rng.integers(0, length + 1, size=(m, 2)), axis=1)
+    in_slice = (cols >= cuts[:, :1]) & (cols < cuts[:, 1:])
+
+    pos_in_p1 = np.empty_like(p1)
+    pos_in_p1[rows, p1] = cols
+    pos = pos_in_p1[rows, p2]
+    from_p2 = ~((pos >= cuts[:, :1]) & (pos < cuts[:, 1:]))
+
+    child = np.empty_like(p1)
+    child[in_slice] = p1[in_slice]
+    child[~in_slice] = p2[from_p2]
+    return child
+
+def _invert_segments(pop: np.ndarray, rows: np.ndarray, rng) -> None:
+    """In-place inversion mutation (a random 2-opt move) on the given rows.
+
+    Every selected row reverses its own ``[i, j)`` slice in one gather: column
+    ``c`` inside the slice reads from ``i + j - 1 - c``, all others read from
+    themselves.
+    """
+    length = pop.shape[1]
+    cuts = np.sort(rng.integers(0, length + 1, size=(len(rows), 2)), axis=1)
+    i, j = cuts[:, :1], cuts[:, 1:]
+    cols = np.arange(length)
+    source = np.where((cols >= i) & (cols < j), i + j - 1 - cols, cols)
+    pop[rows] = np.take_along_axis(pop[rows], source, axis=1)
+
+def solve_genetic(dist: np.ndarray, init_route=None, pop_size: int = 100, time_budget: float = 2.0,
+                  max_generations: int | None = None, elite: int = 2, tournament: int = 3,
+                  mutation_rate: float = 0.4, seed: int = 42, closed: bool = False,
+                  on_improve=None, stop_event=None, patience: int | None = None) -> SolveResult:
+    """Genetic algorithm for the single-vehicle route over ``dist``.
+
+    The population is a ``(pop_size, n - 1)`` int array of visiting orders
+    after the fixed start node; fitness for the whole population is one
+    gather over ``dist``. Each generation keeps ``elite`` best routes and
+    breeds the rest by tournament selection, batched order crossover and
+    inversion mutation. The population is seeded with ``init_route``
+    (greedy by default) and perturbed copies of it, so the result is never
+    worse than the seed.
+
+    Stops after ``time_budget`` seconds, ``max_generations`` generations,
+    ``patience`` generations without improvement, or once ``stop_event`` is set. ``on_improve(route, distance)`` is called
+    whenever the best route improves.
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    init_route = np.asarray(solve_greedy(dist) if init_route is None else init_route)
+    n = len(init_route)
+    if n <= 3:
+        return SolveResult(init_route, route_length(dist, init_route, closed), [], 0.0, 0)
+
+    # Genes are positions into `nodes`, so every individual is a permutation of 0..L-1.
+    start, nodes = init_route[0], init_route[1:]
+    length = n - 1
+    seed_genes = np.arange(length)
+
+    def fitness(pop):
+        tours = nodes[pop]
+        total = dist[start, tours[:, 0]] + dist[tours[:, :-1], tours[:, 1:]].sum(axis=1)
+        if closed:
+            total = total + dist[tours[:, -1], start]
+        return total
+
+    pop = np.tile(seed_genes, (pop_size, 1))
+    n_perturbed = pop_size // 2
+    _invert_segments(pop, np.arange(1, n_perturbed), rng)
+    pop[n_perturbed:] = rng.permuted(pop[n_perturbed:], axis=1)
+
+    fit = fitness(pop)
+    best = int(np.argmin(fit))
+    best_genes, best_dist = pop[best].copy(), float(fit[best])
+    curve = [best_dist]
+    n_children = pop_size - elite
+    generation = last_improved = 0
+    while True:
+        generation += 1
+        order = np.argsort(fit)
+        elites = pop[order[:elite]]
+
+        contenders = rng.integers(0, pop_size, size=(2 * n_children, tournament))
+        winners = contenders[np.arange(2 * n_children), np.argmin(fit[contenders], axis=1)]
+        children = _order_crossover(pop[winners[:n_children]], pop[winners[n_children:]], rng)
+        _invert_segments(children, np.flatnonzero(rng.random(n_children) < mutation_rate), rng)
+
+        pop = np.concatenate([elites, children])
+        fit = fitness(pop)
+        best = int(np.argmin(fit))
+        if fit[best] < best_dist - 1e-12:
+            best_genes, best_dist = pop[best].copy(), float(fit[best])
+            last_improved = generation
+            if on_improve is not None:
+                on_improve(np.concatenate([[start], nodes[best_genes]]), best_dist)
+        curve.append(best_dist)
+
+        if max_generations is not None and generation >= max_generations:
+            break
+        if patience is not None and generation - last_improved >= patience:
+            break
+        if time.perf_counter() - started >= time_budget:
+            break
+        if stop_event is not None and stop_event.is_set():
+            break
+
+    route = np.concatenate([[start], nodes[best_genes]])
+    return SolveResult(route, best_dist, curve, time.perf_counter() - started, generation)
+
+# --- LOCAL SEARCH ---
+
+def improve_route(route, dist: np.ndarray | None = None, lats=None, lons=None, closed: bool = False,
+                  neighbours: int = 10, or_opt: bool = True, time_budget: float | None = None,
+                  stop_event=None, on_improve=None) -> SolveResult:
+    """2-opt and Or-opt local search over ``route`` until no improving move remains.
+
+    Moves are only tried between a node and its ``neighbours`` nearest
+    points and each move's gain is evaluated in O(1) from the four to six
+    edges it changes. Don't-look bits are kept as a work queue: only nodes
+    next to a recently changed edge are re-examined. Distances come from
+    ``dist`` or, when only coordinates are given, are computed on the fly,
+    so tens of thousands of points never need an ``(n, n)`` matrix.
+
+    The first node of ``route`` stays first. ``closed`` optimizes a tour that
+    returns to it; otherwise the route is an open path. Every ``len(route)``
+    node visits the time budget and ``stop_event`` are checked and, if the
+    route got shorter, ``on_improve(route, distance)`` receives a copy.
+    """
+    started = time.perf_counter()
+    d = pair_distance(dist, lats, lons)
+    r = np.array(route, dtype=np.intp)
+    m = len(r)
+    if m < 4:
+        return SolveResult(r, route_length_fn(d, r, closed), [], 0.0, 0)
+    neigh = neighbour_lists(neighbours, dist, lats, lons).tolist()
+    n_nodes = len(neigh)
+    pos = np.full(n_nodes, -1, dtype=np.intp)
+    pos[r] = np.arange(m)
+    eps = 1e-10
+
+    def at(i):
+        """Node at position ``i``, wrapping for closed tours; ``None`` past an open end."""
+        if i < m:
+            return int(r[i])
+        return int(r[0]) if closed else None
+
+    def two_opt_gain(i, j):
+        """Gain of reversing r[i+1..j] (edges (x1,x2),(y1,y2) -> (x1,y1),(x2,y2))."""
+        x1, x2, y1, y2 = int(r[i]), int(r[i + 1]), int(r[j]), at(j + 1)
+        gain = d(x1, x2) - d(x1, y1)
+        if y2 is not None:
+            gain += d(y1, y2) - d(x2, y2)
+        return gain, (x1, x2, y1, y2)
+
+    def try_two_opt(a):
+        pa = int(pos[a])
+        before = d(int(r[pa - 1]), a) if pa > 0 else (d(int(r[-1]), a) if closed else 0.0)
+        after_node = at(pa + 1)
+        after = d(a, after_node) if after_node is not None else 0.0
+        worst = max(before, after)
+        for c in neigh[a]:
+            dac = d(a, c)
+            if dac >= worst:
+                break
+            pc = int(pos[c])
+            if pc < 0:
+                continue
+            p, q = (pa, pc) if pa < pc else (pc, pa)
+            # Both reversals below create the edge (r[p], r[q]) = (a, c).
+            for i, j in ((p, q), (p - 1, q - 1)):
+                if i < 0 or j - i < 2:
+                    continue
+                gain, touched = two_opt_gain(i, j)
+                if gain > eps:
+                    r[i + 1:j + 1] = r[i + 1:j + 1][::-1]
+                    pos[r[i + 1:j + 1]] = np.arange(i + 1, j + 1)
+                    return gain, touched
+        return 0.0, ()
+
+    def try_or_opt(a):
+        nonlocal r
+        pa = int(pos[a])
+        for length in (1, 2, 3):
+            for s in (pa, pa - length + 1):  # segments with `a` at the head or the tail
+                e = s + length - 1
+                if s < 1 or e >= m or (length == 1 and s != pa):
+                    continue
+                prev, head, tail, nxt = int(r[s - 1]), int(r[s]), int(r[e]), at(e + 1)
+                removed = d(prev, head)
+                if nxt is not None:
+                    removed += d(tail, nxt) - d(prev, nxt)
+                other = tail if a == head else head
+                for c in neigh[a]:
+                    dac = d(a, c)
+                    if dac >= removed:
+                        break
+                    pc = int(pos[c])
+                    if pc < 0 or s <= pc <= e:
+                        continue
+                    # Insert between (c, succ c) as [a..other] or between (pred c, c) as [other..a].
+                    for u_pos, a_first in ((pc, True), (pc - 1, False)):
+                        if u_pos < 0:
+                            if not closed:
+                                continue
+                            u_pos = m - 1
+                        u, v = int(r[u_pos]), at(u_pos + 1)
+                        if s - 1 <= u_pos <= e or v == head:
+                            continue
+                        first, last = (a, other) if a_first else (other, a)
+                        added = d(u, first)
+                        if v is not None:
+                            added += d(last, v) - d(u, v)
+                        gain = removed - added
+                        if gain > eps:
+                            segment = r[s:e + 1] if first == head else r[s:e + 1][::-1]
+                            rest = np.concatenate([r[:s], r[e + 1:]])
+                            k = u_pos if u_pos < s else u_pos - length
+                            r = np.concatenate([rest[:k + 1], segment, rest[k + 1:]])
+                            pos[r] = np.arange(m)
+                            return gain, (prev, head, tail, u, c) + ((nxt,) if nxt is not None else ()) \
+                                + ((v,) if v is not None else ())
+        return 0.0, ()
+
+    length_now = route_length_fn(d, r, closed)
+    curve = [length_now]
+    queue = deque(int(x) for x in r)
+    queued = np.zeros(n_nodes, dtype=bool)
+    queued[r] = True
+    moves = 0
+    popped = 0
+    while queue:
+        a = queue.popleft()
+        queued[a] = False
+        popped += 1
+        gain, touched = try_two_opt(a)
+        if gain <= 0 and or_opt:
+            gain, touched = try_or_opt(a)
+        if gain > 0:
+            moves += 1
+            length_now -= gain
+            for node in touched + (a,):
+                if node is not None and not queued[node]:
+                    queued[node] = True
+                    queue.append(node)
+        if popped % m == 0:
+            if on_improve is not None and length_now < curve[-1]:
+                on_improve(r.copy(), length_now)
+            curve.append(length_now)
+            if time_budget is not None and time.perf_counter() - started >= time_budget:
+                break
+            if stop_event is not None and stop_event.is_set():
+                break
+
+    final = route_length_fn(d, r, closed)
+    curve.append(final)
+    return SolveResult(r, final, curve, time.perf_counter() - started, moves)
+
+# --- CAPACITATED MULTI-VEHICLE ROUTING ---
+
+MATRIX_LIMIT = 2000  # routes longer than this use on-the-fly distances instead of a matrix
+PARALLEL_MIN_STOPS = 400  # below this, process start-up costs more than it saves
+
+@dataclass
+class CVRPResult:
+    """Per-vehicle closed tours (depot first, return implied) and their totals."""
+    routes: list
+    distances: list
+    loads: list
+    unassigned: np.ndarray
+    total_distance: float
+    elapsed: float
+
+def sweep_assignment(lats, lons, demands, n_vehicles: int, capacity: float, depot: int = 0) -> tuple[list, np.ndarray]:
+    """Splits stops among vehicles by polar angle around the depot.
+
+    Stops are swept counter-clockwise starting at the widest angular gap, so
+    no natural cluster is cut in two, and each vehicle takes stops until the
+    next one would exceed ``capacity``. Returns the per-vehicle stop arrays
+    and the stops left over, either because every vehicle is full or because
+    their demand alone exceeds ``capacity``.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    demands = np.asarray(demands, dtype=np.float64)
+    stops = np.setdiff1d(np.arange(len(lats)), [depot])
+    if stops.size == 0:
+        return [np.empty(0, dtype=np.intp) for _ in range(n_vehicles)], stops
+
+    dy = lats[stops] - lats[depot]
+    dx = (lons[stops] - lons[depot]) * math.cos(math.radians(lats[depot]))
+    angles = np.arctan2(dy, dx)
+    order = np.argsort(angles, kind="stable")
+    sorted_angles = angles[order]
+    gaps = np.diff(np.concatenate([sorted_angles, sorted_angles[:1] + 2 * np.pi]))
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+    groups, unassigned = [[] for _ in range(n_vehicles)], []
+    vehicle, load = 0, 0.0
+    for stop in stops[order]:
+        if demands[stop] > capacity:  # no vehicle can ever carry it; don't retire vehicles over it
+            unassigned.append(stop)
+            continue
+        while vehicle < n_vehicles and load + demands[stop] > capacity:
+            vehicle, load = vehicle + 1, 0.0
+        if vehicle == n_vehicles:
+            unassigned.append(stop)
+            continue
+        groups[vehicle].append(stop)
+        load += demands[stop]
+    return [np.asarray(g, dtype=np.intp) for g in groups], np.asarray(unassigned, dtype=np.intp)
+
+def _route_vehicle(depot_lat: float, depot_lon: float, stop_lats: np.ndarray, stop_lons: np.ndarray,
+                   time_budget: float | None) -> tuple[np.ndarray, float]:
+    """Greedy + local search for one vehicle; returns positions into the stop arrays (-1 = depot)."""
+    lats = np.concatenate([[depot_lat], stop_lats])
+    lons = np.concatenate([[depot_lon], stop_lons])
+    if len(lats) <= MATRIX_LIMIT:
+        dist = haversine_matrix(lats, lons)
+        result = improve_route(solve_greedy(dist), dist=dist, closed=True, time_budget=time_budget)
+    else:
+        result = improve_route(solve_greedy_spatial(lats, lons), lats=lats, lons=lons, closed=True,
+                               time_budget=time_budget)
+    return result.route - 1, result.distance
+
+_executor = None
+
+def _process_pool() -> ProcessPoolExecutor:
+    """Worker processes shared by every CVRP solve in this process."""
+    global _executor
+    if _executor is None:
+        # spawn, not fork: the Streamlit server is multi-threaded.
+        _executor = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def _reset_process_pool():
+    global _executor
+    _executor = None
+
+def solve_cvrp(lats, lons, demands, n_vehicles: int, capacity: float, depot: int = 0,
+               time_budget: float | None = None, parallel: bool | None = None) -> CVRPResult:
+    """Capacitated multi-vehicle routing: sweep assignment, then per-vehicle optimization.
+
+    Each vehicle's tour is built greedily and improved with ``improve_route``
+    independently, in the shared process pool when the instance has at least
+    ``PARALLEL_MIN_STOPS`` stops (or ``parallel=True``). ``time_budget``
+    bounds the local search of every vehicle.
+    """
+    started = time.perf_counter()
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    demands = np.asarray(demands, dtype=np.float64)
+    groups, unassigned = sweep_assignment(lats, lons, demands, n_vehicles, capacity, depot)
+    jobs = [(lats[depot], lons[depot], lats[g], lons[g], time_budget) for g in groups]
+
+    if parallel is None:
+        parallel = len(lats) >= PARALLEL_MIN_STOPS and (os.cpu_count() or 1) > 1
+    solved = None
+    if parallel:
+        try:
+            futures = [_process_pool().submit(_route_vehicle, *job) for job in jobs]
+            solved = [f.result() for f in futures]
+        except BrokenProcessPool:
+            _reset_process_pool()
+    if solved is None:
+        solved = [_route_vehicle(*job) for job in jobs]
+
+    routes, distances, loads = [], [], []
+    for group, (local_route, distance) in zip(groups, solved):
+        routes.append(np.concatenate([[depot], group])[local_route + 1])
+        distances.append(distance)
+        loads.append(float(demands[group].sum()))
+    return CVRPResult(routes, distances, loads, unassigned, float(sum(distances)), time.perf_counter() - started)
+
+# --- BACKGROUND SOLVING ---
+
+@dataclass
+class SolverSnapshot:
+    """Best-so-far state published by an ``AnytimeSolver``."""
+    route: np.ndarray | None
+    distance: float
+    stage: str
+    elapsed: float
+    done: bool
+    history: list  # (seconds since start, best distance)
+    ga_curve: list
+
+class AnytimeSolver:
+    """Solves a single-vehicle route in a background thread, publishing improvements.
+
+    Runs greedy construction, then the genetic algorithm (instances up to
+    ``MATRIX_LIMIT`` stops) and finally local search, sharing one
+    ``time_budget``. ``snapshot()`` returns the best route found so far at any
+    moment and ``cancel()`` stops the search at the next checkpoint, keeping
+    the best route found.
+    """
+
+    def __init__(self, lats, lons, time_budget: float = 10.0, seed: int = 42):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.time_budget = time_budget
+        self.seed = seed
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._started = None
+        self._route = None
+        self._distance = math.inf
+        self._stage = "queued"
+        self._done = False
+        self._history = []
+        self._ga_curve = []
+        self._thread = threading.Thread(target=self._run, name="anytime-vrp", daemon=True)
+
+    def start(self) -> "AnytimeSolver":
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._stop.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Blocks up to ``timeout`` seconds for the solve to end; returns ``done``."""
+        self._thread.join(timeout)
+        return self.done
+
+    @property
+    def done(self) -> bool:
+        with self._lock:
+            return self._done
+
+    def snapshot(self) -> SolverSnapshot:
+        with self._lock:
+            elapsed = time.perf_counter() - self._started if self._started else 0.0
+            return SolverSnapshot(self._route, self._distance, self._stage, elapsed, self._done,
+                                  list(self._history), list(self._ga_curve))
+
+    def _publish(self, route, distance: float):
+        with self._lock:
+            if distance < self._distance:
+                self._route = np.array(route)
+                self._distance = float(distance)
+                self._history.append((time.perf_counter() - self._started, self._distance))
+
+    def _set_stage(self, stage: str):
+        with self._lock:
+            self._stage = stage
+
+    def _remaining(self) -> float:
+        return max(0.0, self.time_budget - (time.perf_counter() - self._started))
+
+    def _run(self):
+        try:
+            n = len(self.lats)
+            self._set_stage("greedy")
+            if n <= MATRIX_LIMIT:
+                dist = distance_matrix(self.lats, self.lons)
+                route = solve_greedy(dist)
+                self._publish(route, route_length(dist, route))
+                if not self._stop.is_set():
+                    self._set_stage("genetic algorithm")
+                    ga = solve_genetic(dist, route, time_budget=0.5 * self._remaining(), seed=self.seed,
+                                       patience=500, stop_event=self._stop, on_improve=self._publish)
+                    with self._lock:
+                        self._ga_curve = ga.curve
+                    route = ga.route
+                polish = dict(dist=dist)
+            else:
+                route = solve_greedy_spatial(self.lats, self.lons)
+                self._publish(route, route_length_fn(pair_distance(None, self.lats, self.lons), route))
+                polish = dict(lats=self.lats, lons=self.lons)
+            if not self._stop.is_set():
+                self._set_stage("2-opt / Or-opt")
+                result = improve_route(route, time_budget=self._remaining(), stop_event=self._stop,
+                                       on_improve=self._publish, **polish)
+                self._publish(result.route, result.distance)
+            self._set_stage("cancelled" if self._stop.is_set() else "finished")
+        except Exception as e:
+            self._set_stage(f"failed: {e}")
+        finally:
+            with self._lock:
+                self._done = True
+
+# --- RESULT CACHE ---
+
+def instance_fingerprint(algorithm: str, params: dict, *arrays) -> str:
+    """Hash of the instance arrays (coordinates, demands, ...) plus the algorithm and its parameters."""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=np.float64)
+        digest.update(str(array.shape).encode("utf-8"))
+        digest.update(array.tobytes())
+    digest.update(algorithm.encode("utf-8"))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+def _approx_nbytes(obj) -> int:
+    """Rough in-memory size of a solver result, counting arrays and lists of numbers."""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (list, tuple)):
+        return sum(_approx_nbytes(x) for x in obj) + 8 * len(obj)
+    if hasattr(obj, "__dict__"):
+        return sum(_approx_nbytes(v) for v in vars(obj).values())
+    return 8
+
+class SolverCache:
+    """Two-level cache of solver results keyed by ``instance_fingerprint``.
+
+    Results live in an in-memory LRU and, when ``cache_dir`` is set, are also
+    pickled to disk so they survive restarts; a disk hit is promoted back to
+    memory. The disk store is an LRU too: reads refresh a file's modification
+    time and the least recently used files beyond ``max_disk_entries`` are
+    deleted.
+    """
+
+    def __init__(self, max_entries: int = 64, cache_dir: str | None = None, max_disk_entries: int = 256):
+        from utils import LRUCache
+
+        self._memory = LRUCache(max_entries=max_entries)
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.disk_evictions = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key: str):
+        result = self._memory.get(key)
+        if result is not None:
+            return result
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), "rb") as f:
+                    result = pickle.load(f)  # written by put() below
+                os.utime(self._path(key))
+                self._memory.put(key, result)
+                self.disk_hits += 1
+                return result
+            except Exception:
+                os.remove(self._path(key))
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result):
+        self._memory.put(key, result)
+        if self.cache_dir:
+            tmp_path = f"{self._path(key)}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pkl"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:  # removed by another session meanwhile
+                    pass
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_disk_entries)]:
+            try:
+                os.remove(path)
+                self.disk_evictions += 1
+            except FileNotFoundError:
+                pass
+
+    def get_or_solve(self, key: str, solve):
+        """Returns the cached result for ``key``, running ``solve()`` and storing it on a miss."""
+        result = self.get(key)
+        if result is None:
+            result = solve()
+            self.put(key, result)
+        return result
+
+    def stats(self) -> dict:
+        memory = self._memory.stats()
+        hits = memory["hits"] + self.disk_hits
+        total = hits + self.misses
+        return {
+            "entries": memory["entries"],
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "disk_evictions": self.disk_evictions,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "memory_bytes": sum(_approx_nbytes(r) for r in self._memory.values()),
+        }
+
+# --- MAP GEOMETRY ---
+
+def pixel_degrees(zoom: int, tile_size: int = 256) -> float:
+    """Degrees of longitude covered by one screen pixel at a Web Mercator ``zoom`` level."""
+    return 360.0 / (tile_size * 2 ** zoom)
+
+def simplify_polyline(lats, lons, tolerance: float) -> np.ndarray:
+    """Indices of the points Douglas-Peucker keeps for a ``tolerance`` given in degrees of longitude.
+
+    Latitudes are divided by the cosine of the mean latitude, matching the
+    vertical stretch of Web Mercator, while longitudes are left as they are,
+    so the tolerance stays in degrees of longitude (a fixed number of pixels
+    at a given zoom). The first and last points are always kept.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    n = len(lats)
+    if n < 3:
+        return np.arange(n)
+    scale = math.cos(math.radians(float(lats.mean())))
+    y = lats / scale  # Mercator stretches latitude by 1/cos(lat) relative to longitude
+    x = lons
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j - i < 2:
+            continue
+        dx, dy = x[j] - x[i], y[j] - y[i]
+        px, py = x[i + 1:j] - x[i], y[i + 1:j] - y[i]
+        norm = math.hypot(dx, dy)
+        if norm == 0.0:
+            offsets = np.hypot(px, py)
+        else:
+            offsets = np.abs(px * dy - py * dx) / norm
+        k = int(np.argmax(offsets))
+        if offsets[k] > tolerance:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+    return np.flatnonzero(keep)
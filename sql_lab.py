@@ -0,0 +1,397 @@
+"""SQLite databases for the SQL Lab page.
+
+One seeded template database is built per process. Every browser session
+gets its own in-memory copy, made with the SQLite backup API, so reruns reuse
+the session's connection and tables a visitor creates last until the session
+goes idle.
+"""
+import time
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from utils import LRUCache
+
+TABLE_NAME = "internship_applications"
+
+SCHEMA = """CREATE TABLE internship_applications (
+    id INTEGER PRIMARY KEY,
+    company TEXT,
+    role TEXT,
+    status TEXT,
+    gpa_cutoff REAL
+)"""
+
+SEED_ROWS = [
+    (1, "Google", "SDE Intern", "Interview", 9.0),
+    (2, "Microsoft", "ML Intern", "Applied", 8.5),
+    (3, "Amazon", "SDE Intern", "Applied", 8.0),
+    (4, "Uber", "Backend Intern", "Rejected", 8.5),
+    (5, "Atlassian", "SDE Intern", "Offer", 8.5),
+    (6, "Sprinklr", "Product Engineer", "Applied", 8.0),
+    (7, "Media.net", "SDE Intern", "Interview", 8.2),
+]
+
+RELATED_SCHEMA = [
+    """CREATE TABLE companies (
+    name TEXT PRIMARY KEY,
+    sector TEXT,
+    city TEXT,
+    headcount INTEGER
+)""",
+    """CREATE TABLE interviews (
+    id INTEGER PRIMARY KEY,
+    application_id INTEGER REFERENCES internship_applications(id),
+    round INTEGER,
+    outcome TEXT,
+    score REAL
+)""",
+]
+
+SESSION_IDLE_TTL = 30 * 60  # seconds without a rerun before a session's copy is closed
+MAX_SESSIONS = 200
+REAP_INTERVAL = 60
+
+QUERY_TIMEOUT = 3.0  # seconds of execution per statement
+ROW_CAP = 10_000
+PAGE_ROWS = 100
+PROGRESS_STEPS = 1_000  # VM instructions between progress handler calls
+
+def connect_memory() -> sqlite3.Connection:
+    # Streamlit may rerun a session on a different thread than the one that created its copy.
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+def build_template() -> sqlite3.Connection:
+    conn = connect_memory()
+    with conn:
+        conn.execute(SCHEMA)
+        conn.executemany(f"INSERT INTO {TABLE_NAME} VALUES (?,?,?,?,?)", SEED_ROWS)
+    return conn
+
+def database_bytes(conn: sqlite3.Connection) -> int:
+    """Size of the database pages held by ``conn`` (``page_count * page_size``)."""
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+def list_tables(conn: sqlite3.Connection) -> list[str]:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name").fetchall()
+    return [name for name, in rows]
+
+class SessionDatabases:
+    """Per-session copies of a template database, closed after ``idle_ttl`` seconds unused.
+
+    Idle copies are reaped on every ``connect`` and by a daemon thread every
+    ``reap_interval`` seconds, so memory is returned even when nobody visits.
+    Beyond ``max_sessions`` the least recently used copy is closed.
+    """
+
+    def __init__(self, template: sqlite3.Connection | None = None, idle_ttl: float = SESSION_IDLE_TTL,
+                 max_sessions: int = MAX_SESSIONS, reap_interval: float | None = REAP_INTERVAL):
+        self._template = template if template is not None else build_template()
+        self._template_lock = threading.Lock()
+        self._template_bytes = database_bytes(self._template)
+        self._sizes = {}  # session id -> bytes, measured by the session itself on connect
+        self._sessions = LRUCache(max_entries=max_sessions, ttl=idle_ttl, on_evict=lambda conn: conn.close())
+        self._stop = threading.Event()
+        if reap_interval:
+            threading.Thread(target=self._reap_loop, args=(reap_interval,), name="sql-lab-reaper",
+                             daemon=True).start()
+
+    def _copy_template(self) -> sqlite3.Connection:
+        conn = connect_memory()
+        with self._template_lock:
+            self._template.backup(conn)
+        return conn
+
+    def connect(self, session_id: str) -> sqlite3.Connection:
+        """The session's own database, copied from the template on first use.
+
+        Also records its size for ``stats``, so totals never have to query
+        connections that other sessions may be busy with.
+        """
+        conn = self._sessions.get_or_create(session_id, self._copy_template)
+        self._sizes[session_id] = database_bytes(conn)
+        return conn
+
+    def reset(self, session_id: str) -> sqlite3.Connection:
+        """Replaces the session's database with a fresh template copy, closing the old one."""
+        conn = self._copy_template()
+        self._sessions.put(session_id, conn)
+        self._sizes[session_id] = self._template_bytes
+        return conn
+
+    def reap(self) -> int:
+        """Closes every idle session database now; returns how many were closed."""
+        return self._sessions.expire()
+
+    def _reap_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            self.reap()
+
+    def close(self):
+        self._stop.set()
+        for conn in self._sessions.values():
+            conn.close()
+        self._sessions.clear()
+
+    def stats(self) -> dict:
+        """Session count and memory, from the sizes each session recorded on its last ``connect``."""
+        live = {session_id for session_id, _ in self._sessions.items()}
+        for session_id in list(self._sizes):
+            if session_id not in live:
+                self._sizes.pop(session_id, None)
+        sizes = [self._sizes.get(session_id, 0) for session_id in live]
+        return {
+            "sessions": len(sizes),
+            "total_bytes": sum(sizes),
+            "template_bytes": self._template_bytes,
+            "reaped": self._sessions.evictions,
+        }
+
+def unique_columns(names: list[str]) -> list[str]:
+    """Column labels with repeats suffixed (``id``, ``id_2``, ...) so pandas accepts them."""
+    seen = set(names)
+    counts = {}
+    labels = []
+    for name in names:
+        counts[name] = counts.get(name, 0) + 1
+        label = name
+        if counts[name] > 1:
+            suffix = counts[name]
+            while f"{name}_{suffix}" in seen:
+                suffix += 1
+            counts[name] = suffix
+            label = f"{name}_{suffix}"
+        seen.add(label)
+        labels.append(label)
+    return labels
+
+class QueryTimeout(Exception):
+    """Raised when a statement runs past its time budget and SQLite interrupts it."""
+
+class PagedQuery:
+    """One SQL statement whose result set is read a page at a time with ``fetchmany``.
+
+    Execution and every later fetch run under SQLite's progress handler,
+    which interrupts the statement once it has used ``timeout`` seconds in
+    total. At most ``row_cap`` rows are ever fetched, and only pages that
+    have been viewed are held in memory. ``vm_steps`` counts virtual machine
+    instructions in steps of ``PROGRESS_STEPS``; Python's ``sqlite3`` does not
+    expose rows scanned, so this is the closest measure of work done.
+    Statements without a result set are committed and have ``columns = None``;
+    repeated column names (``SELECT 1, 1`` or a self-join) are made unique.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, sql: str, page_rows: int = PAGE_ROWS, row_cap: int = ROW_CAP,
+                 timeout: float = QUERY_TIMEOUT):
+        self.conn = conn
+        self.page_rows = page_rows
+        self.row_cap = row_cap
+        self.timeout = timeout
+        self.rows = []
+        self.elapsed = 0.0
+        self.vm_steps = 0
+        self.capped = False  # more rows existed beyond row_cap
+        self.exhausted = False
+        self.cursor = None
+        self.cursor = self._guarded(conn.execute, sql)
+        self.rowcount = self.cursor.rowcount
+        if self.cursor.description is None:
+            self.columns = None
+            conn.commit()
+            self.exhausted = True
+            self.close()
+        else:
+            self.columns = unique_columns([d[0] for d in self.cursor.description])
+
+    def _guarded(self, fn, *args):
+        started = time.perf_counter()
+        deadline = started + self.timeout - self.elapsed
+
+        def progress():
+            self.vm_steps += PROGRESS_STEPS
+            return time.perf_counter() > deadline
+
+        self.conn.set_progress_handler(progress, PROGRESS_STEPS)
+        try:
+            return fn(*args)
+        except sqlite3.OperationalError as e:
+            if str(e) == "interrupted":
+                self.close()  # an interrupted statement cannot be resumed
+                raise QueryTimeout(f"Query stopped after the {self.timeout:g}s limit.") from e
+            raise
+        finally:
+            self.conn.set_progress_handler(None, 0)
+            self.elapsed += time.perf_counter() - started
+
+    def page(self, index: int) -> list[tuple]:
+        """Rows of page ``index``, fetching from the cursor as far as needed."""
+        end = (index + 1) * self.page_rows
+        while len(self.rows) < end and not self.exhausted:
+            want = min(self.page_rows, self.row_cap - len(self.rows))
+            batch = self._guarded(self.cursor.fetchmany, want)
+            self.rows.extend(batch)
+            if len(batch) < want:
+                self.exhausted = True
+            elif len(self.rows) >= self.row_cap:
+                self.capped = self._guarded(self.cursor.fetchone) is not None
+                self.exhausted = True
+            if self.exhausted:
+                self.close()
+        return self.rows[index * self.page_rows:end]
+
+    @property
+    def pages_loaded(self) -> int:
+        return max(1, -(-len(self.rows) // self.page_rows))
+
+    def close(self):
+        self.exhausted = True
+        if self.cursor is not None:
+            self.cursor.close()
+
+# --- LARGE DATASET MODE ---
+
+COMPANIES = ["Google", "Microsoft", "Amazon", "Uber", "Atlassian", "Sprinklr", "Media.net", "Adobe", "Flipkart",
+             "Zomato", "Swiggy", "Razorpay", "CRED", "Meesho", "Goldman Sachs", "JPMorgan", "DE Shaw",
+             "Tower Research", "Nvidia", "Qualcomm", "Intel", "Samsung", "Oracle", "Salesforce", "Walmart"]
+ROLES = ["SDE Intern", "ML Intern", "Backend Intern", "Product Engineer", "Data Analyst Intern", "Quant Intern",
+         "Frontend Intern", "SRE Intern"]
+STATUSES = ["Applied", "Interview", "Rejected", "Offer"]
+STATUS_WEIGHTS = [0.55, 0.2, 0.22, 0.03]
+SECTORS = ["Tech", "Fintech", "Consumer", "Semiconductors", "Finance"]
+CITIES = ["Bengaluru", "Hyderabad", "Mumbai", "Pune", "Gurugram", "Chennai"]
+OUTCOMES = ["Pass", "Fail", "No show"]
+SEED_BATCH_ROWS = 50_000
+
+@dataclass
+class SeedStats:
+    """Totals from ``seed_large``."""
+    rows: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+def _batches(columns: list, batch_rows: int):
+    """Row tuples from parallel NumPy columns, ``batch_rows`` at a time, for ``executemany``."""
+    for start in range(0, len(columns[0]), batch_rows):
+        yield zip(*(c[start:start + batch_rows].tolist() for c in columns))
+
+def seed_large(conn: sqlite3.Connection, n_applications: int, seed: int = 42,
+               batch_rows: int = SEED_BATCH_ROWS) -> SeedStats:
+    """Replaces ``internship_applications`` with ``n_applications`` synthetic rows, plus
+    ``companies`` and about two ``interviews`` per interviewed application.
+
+    Columns are generated with NumPy and inserted with batched ``executemany``
+    in one transaction, with journaling and syncing turned off for the load.
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    company_ids = np.arange(len(COMPANIES))
+    app_company = rng.integers(0, len(COMPANIES), n_applications)
+    applications = [
+        np.arange(1, n_applications + 1),
+        np.array(COMPANIES, dtype=object)[app_company],
+        np.array(ROLES, dtype=object)[rng.integers(0, len(ROLES), n_applications)],
+        np.array(STATUSES, dtype=object)[rng.choice(len(STATUSES), n_applications, p=STATUS_WEIGHTS)],
+        np.round(rng.uniform(6.0, 9.5, n_applications), 1),
+    ]
+    interviewed = np.flatnonzero(np.isin(applications[3], ["Interview", "Offer", "Rejected"]))
+    rounds = rng.integers(1, 4, len(interviewed))
+    interview_app = np.repeat(interviewed + 1, rounds)
+    n_interviews = len(interview_app)
+    interviews = [
+        np.arange(1, n_interviews + 1),
+        interview_app,
+        np.concatenate([np.arange(1, r + 1) for r in rounds]) if n_interviews else np.array([], dtype=int),
+        np.array(OUTCOMES, dtype=object)[rng.choice(len(OUTCOMES), n_interviews, p=[0.6, 0.35, 0.05])],
+        np.round(rng.uniform(1, 10, n_interviews), 1),
+    ]
+    companies = [
+        np.array(COMPANIES, dtype=object),
+        np.array(SECTORS, dtype=object)[company_ids % len(SECTORS)],
+        np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), len(COMPANIES))],
+        rng.integers(200, 200_000, len(COMPANIES)),
+    ]
+
+    # Journaling is only switched off for the bulk load; later statements must still roll back on failure.
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    try:
+        for table in ("interviews", "companies", TABLE_NAME):
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute(SCHEMA)
+        for ddl in RELATED_SCHEMA:
+            conn.execute(ddl)
+        with conn:
+            for table, columns in ((TABLE_NAME, applications), ("companies", companies),
+                                   ("interviews", interviews)):
+                placeholders = ",".join("?" * len(columns))
+                for batch in _batches(columns, batch_rows):
+                    conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", batch)
+    finally:
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        conn.execute(f"PRAGMA synchronous = {int(synchronous)}")
+    return SeedStats(n_applications + n_interviews + len(COMPANIES), time.perf_counter() - started)
+
+def list_indexes(conn: sqlite3.Connection) -> list[tuple[str, str]]:
+    """``(index name, CREATE statement)`` of every user-created index."""
+    return conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+                        "ORDER BY name").fetchall()
+
+def table_columns(conn: sqlite3.Connection, table: str) -> list[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+def create_index(conn: sqlite3.Connection, table: str, columns: list[str]) -> tuple[str, float]:
+    """Creates an index on ``table(columns)``; returns its name and build time in seconds."""
+    known = table_columns(conn, table)
+    unknown = [c for c in columns if c not in known]
+    if not columns or unknown:
+        raise ValueError(f"unknown column(s) for {table}: {', '.join(unknown) or '(none given)'}")
+    name = f"idx_{table}_{'_'.join(columns)}"
+    started = time.perf_counter()
+    with conn:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table)} "
+                     f"({', '.join(_quote(c) for c in columns)})")
+    return name, time.perf_counter() - started
+
+def drop_index(conn: sqlite3.Connection, name: str):
+    with conn:
+        conn.execute(f"DROP INDEX IF EXISTS {_quote(name)}")
+
+@dataclass
+class QueryProfile:
+    """``EXPLAIN QUERY PLAN`` output and one measured execution of a statement."""
+    sql: str
+    plan: str
+    elapsed: float
+    rows: int
+    vm_steps: int
+    indexes: list
+
+def format_plan(rows: list[tuple]) -> str:
+    """Indents ``EXPLAIN QUERY PLAN`` rows ``(id, parent, notused, detail)`` as a tree."""
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("   " * depth[node_id] + "└─ " + detail)
+    return "\n".join(lines)
+
+def profile_query(conn: sqlite3.Connection, sql: str, timeout: float = QUERY_TIMEOUT,
+                  row_cap: int = ROW_CAP) -> QueryProfile:
+    """Plans ``sql`` and times a full run of it (up to ``row_cap`` rows) under the usual guardrails."""
+    plan = format_plan(conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall())
+    query = PagedQuery(conn, sql, page_rows=row_cap, row_cap=row_cap, timeout=timeout)
+    rows = len(query.page(0)) if query.columns is not None else max(query.rowcount, 0)
+    query.close()
+    return QueryProfile(sql, plan, query.elapsed, rows, query.vm_steps, [name for name, _ in list_indexes(conn)])
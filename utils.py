@@ -1,6 +1,11 @@
 import os
+import shutil
+import hashlib
 import logging
-import math
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 import streamlit as st  # Added Streamlit import
 import pandas as pd
 import numpy as np
@@ -10,9 +15,116 @@ import requests
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def _sigmoid(x):
-    """Helper function for demonstration purposes."""
-    return 1 / (1 + math.exp(-x))
+class LRUCache:
+    """Thread-safe LRU mapping with an optional idle TTL and hit/miss counters.
+
+    Entries that have not been read or written for ``ttl`` seconds are dropped
+    lazily on the next access (or by ``expire()``), and the least recently
+    used entry is evicted once ``max_entries`` is exceeded. ``on_evict(value)``
+    is called for every dropped entry, outside the lock, e.g. to close it.
+    """
+    def __init__(self, max_entries: int = 32, ttl: float | None = None, on_evict=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()  # key -> (value, last_used)
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float, dropped: list):
+        if self.ttl is None:
+            return
+        while self._data:
+            key, (value, last_used) = next(iter(self._data.items()))
+            if now - last_used <= self.ttl:
+                break
+            del self._data[key]
+            dropped.append(value)
+            self.evictions += 1
+
+    def _evicted(self, dropped: list):
+        if self.on_evict is not None:
+            for value in dropped:
+                self.on_evict(value)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        dropped = []
+        with self._lock:
+            self._expire(now, dropped)
+            if key not in self._data:
+                self.misses += 1
+                value = default
+            else:
+                value, _ = self._data.pop(key)
+                self._data[key] = (value, now)
+                self.hits += 1
+        self._evicted(dropped)
+        return value
+
+    def put(self, key, value):
+        now = time.monotonic()
+        dropped = []
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None and previous[0] is not value:
+                dropped.append(previous[0])
+            self._data[key] = (value, now)
+            self._expire(now, dropped)
+            while len(self._data) > self.max_entries:
+                dropped.append(self._data.popitem(last=False)[1][0])
+                self.evictions += 1
+        self._evicted(dropped)
+
+    def pop(self, key, default=None):
+        """Removes ``key`` and returns its value without calling ``on_evict``."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def expire(self) -> int:
+        """Drops every idle entry now; returns how many were dropped."""
+        dropped = []
+        with self._lock:
+            self._expire(time.monotonic(), dropped)
+        self._evicted(dropped)
+        return len(dropped)
+
+    def get_or_create(self, key, factory):
+        """Returns the cached value for ``key``, calling ``factory()`` on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def values(self) -> list:
+        with self._lock:
+            return [value for value, _ in self._data.values()]
+
+    def items(self) -> list:
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._data.items()]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
 
 # --- THEME LOGIC ---
 
@@ -106,42 +218,334 @@ class StubChain:
     def invoke(self, input_data):
         return {"result": self.run(str(input_data))}
 
-def build_rag_chain(api_key: str | None = None) -> object:
-    """Initializes a RAG chain for the resume."""
+RESUME_PDF_PATH = os.path.join("assets", "resume.pdf")
+RAG_CACHE_DIR = os.path.join(".cache", "rag")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+OPENAI_EMBEDDING_MODEL = "text-embedding-ada-002"
+RAG_POOL_MAX_ENTRIES = 16
+RAG_POOL_IDLE_TTL = 30 * 60  # seconds
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("RAG_ANSWER_CACHE_THRESHOLD", "0.85"))
+ANSWER_CACHE_TTL = 24 * 3600  # seconds
+
+def resume_fingerprint(pdf_path: str = RESUME_PDF_PATH, embedding_id: str = OPENAI_EMBEDDING_MODEL) -> str:
+    """Hashes the resume bytes together with the chunking and embedding settings."""
+    digest = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    digest.update(f"|{CHUNK_SIZE}|{CHUNK_OVERLAP}|{embedding_id}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def load_resume_chunks(pdf_path: str = RESUME_PDF_PATH) -> list:
+    """Loads the resume PDF and splits it into retrieval-sized chunks."""
+    from langchain_community.document_loaders import PyPDFLoader
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    documents = PyPDFLoader(pdf_path).load()
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return text_splitter.split_documents(documents)
+
+def load_or_build_vectorstore(embeddings, embedding_id: str, pdf_path: str = RESUME_PDF_PATH,
+                              cache_dir: str = RAG_CACHE_DIR):
+    """Returns the resume FAISS index, loading it from disk when the resume is unchanged.
+
+    Each build is stored under ``cache_dir/<fingerprint>``, so a new resume or
+    new splitter/embedding settings simply produce a new directory.
+    """
+    from langchain_community.vectorstores import FAISS
+
+    index_dir = os.path.join(cache_dir, resume_fingerprint(pdf_path, embedding_id))
+    if os.path.exists(os.path.join(index_dir, "index.faiss")):
+        try:
+            # The pickle was written by save_local below, never by a third party.
+            return FAISS.load_local(index_dir, embeddings, allow_dangerous_deserialization=True)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable RAG cache at {index_dir}: {e}")
+            shutil.rmtree(index_dir, ignore_errors=True)
+
+    chunks = load_resume_chunks(pdf_path)
+    vectorstore = FAISS.from_documents(chunks, embeddings)
+
+    # Write to a private directory first so concurrent builds never expose a half-written index.
+    tmp_dir = f"{index_dir}.tmp-{os.getpid()}"
+    vectorstore.save_local(tmp_dir)
+    try:
+        os.replace(tmp_dir, index_dir)
+    except OSError:
+        # Another process published the same fingerprint first; its copy is equivalent.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    logger.info(f"Built RAG index for resume ({len(chunks)} chunks) at {index_dir}")
+    return vectorstore
+
+def get_embedding_backend() -> str:
+    """Embedding backend selected through the ``RAG_EMBEDDING_BACKEND`` environment variable."""
+    return os.environ.get("RAG_EMBEDDING_BACKEND", "openai").lower().strip()
+
+def build_offline_engine(pdf_path: str = RESUME_PDF_PATH) -> object:
+    """Extractive answer engine over the resume that needs no API key or network."""
+    try:
+        import rag
+        embeddings = rag.LocalHashingEmbeddings()
+        vectorstore = load_or_build_vectorstore(embeddings, embeddings.embedding_id, pdf_path)
+        return rag.ExtractiveAnswerEngine(rag.vectorstore_documents(vectorstore), embeddings)
+    except ImportError:
+        return StubChain("Required libraries not installed.")
+    except Exception as e:
+        return StubChain(f"Internal RAG Error: {str(e)}")
+
+def build_rag_chain(api_key: str | None = None, http_client=None,
+                    embedding_backend: str | None = None, llm=None) -> object:
+    """Initializes a RAG chain for the resume.
+
+    ``embedding_backend`` is ``"openai"`` or ``"local"``; it defaults to the
+    ``RAG_EMBEDDING_BACKEND`` environment variable. Passing ``llm`` (e.g.
+    ``rag.fake_streaming_llm()``) replaces ChatOpenAI, which together with the
+    local backend gives a chain that runs without network access.
+    """
     try:
-        from langchain_community.document_loaders import PyPDFLoader
-        from langchain.text_splitter import RecursiveCharacterTextSplitter
-        from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-        from langchain_community.vectorstores import FAISS
+        from langchain_openai import ChatOpenAI
         from langchain.chains import RetrievalQA
+        import rag
     except ImportError:
         return StubChain("Required libraries not installed.")
 
-    pdf_path = os.path.join("assets", "resume.pdf")
+    pdf_path = RESUME_PDF_PATH
     if not os.path.exists(pdf_path):
         return StubChain("Resume file not found in assets/resume.pdf.")
 
     final_api_key = api_key or os.environ.get("OPENAI_API_KEY")
-    if not final_api_key:
-        return StubChain("OpenAI API Key is missing.")
+    if not final_api_key and llm is None:
+        return build_offline_engine(pdf_path)
 
     try:
-        loader = PyPDFLoader(pdf_path)
-        documents = loader.load()
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        chunks = text_splitter.split_documents(documents)
-        
-        embeddings = OpenAIEmbeddings(openai_api_key=final_api_key)
-        vectorstore = FAISS.from_documents(chunks, embeddings)
+        embeddings, embedding_id = rag.make_embeddings(
+            embedding_backend or get_embedding_backend(), final_api_key, http_client
+        )
+        vectorstore = load_or_build_vectorstore(embeddings, embedding_id, pdf_path)
         
-        llm = ChatOpenAI(temperature=0, openai_api_key=final_api_key, model_name="gpt-3.5-turbo")
+        if llm is None:
+            llm = ChatOpenAI(
+                temperature=0, openai_api_key=final_api_key, model_name="gpt-3.5-turbo", http_client=http_client
+            )
+        retriever = rag.HybridRetriever(
+            vectorstore=vectorstore, bm25=rag.BM25Index(rag.vectorstore_documents(vectorstore))
+        )
         qa_chain = RetrievalQA.from_chain_type(
-            llm=llm, chain_type="stuff", retriever=vectorstore.as_retriever()
+            llm=llm, chain_type="stuff", retriever=retriever
         )
         return qa_chain
     except Exception as e:
         return StubChain(f"Internal RAG Error: {str(e)}")
 
+@dataclass
+class StreamTimings:
+    """Wall-clock milestones of one streamed answer, from ``time.perf_counter()``."""
+    started: float = 0.0
+    first_token: float | None = None
+    finished: float | None = None
+
+    @property
+    def ttft_ms(self) -> float | None:
+        return None if self.first_token is None else (self.first_token - self.started) * 1000
+
+    @property
+    def total_ms(self) -> float | None:
+        return None if self.finished is None else (self.finished - self.started) * 1000
+
+def stream_answer(chain, query: str, timings: StreamTimings | None = None):
+    """Yields the answer to ``query`` piece by piece as the LLM produces tokens.
+
+    For a ``RetrievalQA`` "stuff" chain the documents are retrieved and the
+    chain's own prompt is streamed through its LLM; any other chain object
+    (``StubChain`` and friends) yields its complete answer once.
+    """
+    timings = timings if timings is not None else StreamTimings()
+    timings.started = time.perf_counter()
+    combine_chain = getattr(chain, "combine_documents_chain", None)
+    llm_chain = getattr(combine_chain, "llm_chain", None)
+    try:
+        if llm_chain is None:
+            pieces = [chain.invoke(query)["result"]]
+        else:
+            docs = chain.retriever.invoke(query)
+            context = combine_chain.document_separator.join(d.page_content for d in docs)
+            prompt_value = llm_chain.prompt.format_prompt(
+                **{combine_chain.document_variable_name: context, "question": query}
+            )
+            pieces = (getattr(chunk, "content", chunk) for chunk in llm_chain.llm.stream(prompt_value))
+        for piece in pieces:
+            if not piece:
+                continue
+            if timings.first_token is None:
+                timings.first_token = time.perf_counter()
+            yield piece
+    finally:
+        timings.finished = time.perf_counter()
+
+def api_key_fingerprint(api_key: str) -> str:
+    """Stable identifier for an API key that never exposes the key itself."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+@st.cache_resource
+def _rag_chain_pool() -> LRUCache:
+    """Process-wide pool of ready chains, shared by every session and rerun."""
+    return LRUCache(max_entries=RAG_POOL_MAX_ENTRIES, ttl=RAG_POOL_IDLE_TTL)
+
+@st.cache_resource
+def _shared_http_client():
+    """Keep-alive HTTP client reused by all pooled OpenAI clients."""
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+    )
+
+def get_rag_chain(api_key: str | None = None) -> object:
+    """Returns a pooled RAG chain for ``api_key``, building it on first use.
+
+    Chains are keyed by a hash of the key, evicted LRU-first once the pool is
+    full and dropped after ``RAG_POOL_IDLE_TTL`` seconds without use. Without
+    a key the shared offline extractive engine is returned. Failed builds
+    (``StubChain``) are never pooled so a fixed key is retried.
+    """
+    final_api_key = api_key or os.environ.get("OPENAI_API_KEY")
+    pool = _rag_chain_pool()
+    if final_api_key:
+        pool_key = f"{api_key_fingerprint(final_api_key)}:{get_embedding_backend()}"
+    else:
+        pool_key = "offline"
+    chain = pool.get(pool_key)
+    if chain is None:
+        try:
+            http_client = _shared_http_client()
+        except ImportError:
+            http_client = None
+        chain = build_rag_chain(final_api_key, http_client=http_client)
+        if isinstance(chain, StubChain):
+            return chain
+        pool.put(pool_key, chain)
+    return chain
+
+@st.cache_resource(max_entries=1)
+def _answer_cache(resume_hash: str):
+    import rag
+    return rag.SemanticAnswerCache(
+        threshold=ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL, resume_hash=resume_hash
+    )
+
+def get_answer_cache():
+    """Process-wide answer cache for the current resume, or ``None`` if unavailable.
+
+    The cache is keyed by the resume hash, so replacing ``assets/resume.pdf``
+    starts a fresh cache and the stale one is evicted.
+    """
+    if not os.path.exists(RESUME_PDF_PATH):
+        return None
+    try:
+        return _answer_cache(resume_fingerprint(RESUME_PDF_PATH, "answer-cache"))
+    except ImportError:
+        return None
+
+# --- CHAT HISTORY ---
+
+CHAT_HISTORY_TOKEN_BUDGET = 3000
+CHAT_HISTORY_VISIBLE = 20
+CHAT_SUMMARY_MAX_QUESTIONS = 30
+
+@st.cache_resource
+def _token_encoder():
+    """The gpt-3.5-turbo tokenizer, or ``None`` if it cannot be loaded (cached either way)."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating tokens from length: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Token count under the gpt-3.5-turbo encoding (~4 chars/token if tiktoken is unavailable)."""
+    encoder = _token_encoder()
+    if encoder is None:
+        return max(1, len(text) // 4)
+    return len(encoder.encode(text))
+
+def message_tokens(message: dict) -> int:
+    """Token count of a chat message, memoized on the message itself."""
+    if "tokens" not in message:
+        message["tokens"] = count_tokens(message["content"])
+    return message["tokens"]
+
+def _summary_message(questions: list[str], compacted: int) -> dict:
+    lines = [f"🗂️ *{compacted} earlier messages were compacted. Topics covered:*"]
+    lines += [f"- {q}" for q in questions]
+    return {
+        "role": "assistant",
+        "content": "\n".join(lines),
+        "summary": True,
+        "questions": questions,
+        "compacted": compacted,
+    }
+
+def compact_history(messages: list[dict], token_budget: int | None = CHAT_HISTORY_TOKEN_BUDGET) -> list[dict]:
+    """Keeps the newest messages that fit in ``token_budget`` and folds older ones into a summary.
+
+    The summary is a single leading message listing the user questions that
+    were dropped (at most ``CHAT_SUMMARY_MAX_QUESTIONS``), so memory per session
+    stays bounded however long the conversation runs. ``None`` disables
+    compaction.
+    """
+    if token_budget is None:
+        return messages
+    summary = messages[0] if messages and messages[0].get("summary") else None
+    recent = messages[1:] if summary else messages
+
+    used = 0
+    keep_from = len(recent)
+    while keep_from > 0 and used + message_tokens(recent[keep_from - 1]) <= token_budget:
+        keep_from -= 1
+        used += message_tokens(recent[keep_from])
+    # Always keep the latest message, and start the window on a user turn.
+    keep_from = min(keep_from, len(recent) - 1)
+    while 0 < keep_from < len(recent) - 1 and recent[keep_from]["role"] != "user":
+        keep_from += 1
+    if keep_from <= 0:
+        return messages
+
+    dropped = recent[:keep_from]
+    questions = (summary["questions"] if summary else []) + [
+        m["content"][:80] for m in dropped if m["role"] == "user"
+    ]
+    compacted = (summary["compacted"] if summary else 0) + len(dropped)
+    return [_summary_message(questions[-CHAT_SUMMARY_MAX_QUESTIONS:], compacted)] + recent[keep_from:]
+
+def _render_message(message: dict):
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+        if message.get("latency"):
+            st.caption(message["latency"])
+
+def render_chat_history(messages: list[dict], visible: int | None = CHAT_HISTORY_VISIBLE):
+    """Draws the last ``visible`` messages; older ones are paged inside an expander.
+
+    Only one page of older messages is drawn per rerun, so render cost stays
+    proportional to ``visible`` rather than to the history length.
+    """
+    if visible is None or len(messages) <= visible:
+        for message in messages:
+            _render_message(message)
+        return
+
+    older = messages[:-visible]
+    with st.expander(f"📜 {len(older)} earlier messages"):
+        n_pages = (len(older) + visible - 1) // visible
+        page = st.number_input("Page (1 = newest)", 1, n_pages, 1, key="history_page") if n_pages > 1 else 1
+        end = len(older) - (page - 1) * visible
+        for message in older[max(0, end - visible):end]:
+            _render_message(message)
+    for message in messages[-visible:]:
+        _render_message(message)
+
 # --- STATS HELPERS (Existing) ---
 @st.cache_data(ttl=3600)
 def fetch_codeforces_stats(handle):